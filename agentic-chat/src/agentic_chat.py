@@ -1,51 +1,358 @@
+import argparse
 import asyncio
+import hashlib
+import json
+import os
+import sys
 import textwrap
+import time
 from dotenv import load_dotenv
-from agents import Agent, Runner
+from agents import Agent, Runner, set_tracing_disabled
+from openai.types.responses import ResponseTextDeltaEvent
+from stub_model import StubModel
 
 LANGUAGE="German"
+TOPIC="libertarianism vs. communism"
+ROUNDS=10
+WINDOW=4
 
-async def main():
-    load_dotenv()
-    general_rules = f"""
-        Let's discuss the topic libertarianism vs. communism.
-        Please keep your contributions to the discussion short, no more than 2 short sentences in a single contribution.
-        Always try to falsify the claims of the other participant(s).     
-        But please stay friendly and open to other opinions.
-        Contributions longer than 2 sentences are strictly forbidden.
-        Add a single line break after each sentence.
-        Do not start your contribution with any kind of headline. 
-        Output all texts in {LANGUAGE}. 
+class TranscriptContext:
+    """
+    Sends the complete transcript of the debate to each participant in every turn.
+
+    Simple, but the input tokens per turn grow with every contribution,
+    thus the total input tokens of a debate grow quadratically with the number of rounds.
+    """
+
+    def __init__(self, opening: str):
+        self.transcript = opening
+
+    def input_for(self, agent: Agent) -> str:
+        return self.transcript
+
+    def state(self) -> dict:
+        return {"transcript": self.transcript}
+
+    def restore(self, state: dict) -> None:
+        self.transcript = state["transcript"]
+
+    async def add(self, speaker: str, contribution: str) -> None:
+        self.transcript += f"\n=== {speaker}:\n{contribution}"
+
+class DebateContext:
+    """
+    Keeps the conversation state of the debate from the point of view of each participant.
+
+    Each participant sees its own contributions as its own (assistant) messages and those of the
+    others as new (user) messages. Only the latest contributions are sent verbatim,
+    older ones are folded into a rolling summary, so the input per turn stays bounded.
+    """
+
+    def __init__(self, opening: str, summarizer: Agent, window: int = WINDOW):
         """
-    libertarian = Agent(name="Libertarian", instructions="""
+        Args:
+            opening: the opening words of the moderator
+            summarizer: agent which folds older contributions into the rolling summary
+            window: number of latest contributions which are sent verbatim
+        """
+        self.opening = opening
+        self.summarizer = summarizer
+        self.window = window
+        self.summary = ""
+        self.recent: list[tuple[str, str]] = []
+        self.summary_input_tokens = 0
+
+    def input_for(self, agent: Agent) -> list[dict]:
+        items = [{"role": "user", "content": self.opening}]
+        if self.summary:
+            items.append({"role": "user", "content": f"Summary of the discussion so far:\n{self.summary}"})
+        for speaker, contribution in self.recent:
+            if speaker == agent.name:
+                items.append({"role": "assistant", "content": contribution})
+            else:
+                items.append({"role": "user", "content": f"=== {speaker}:\n{contribution}"})
+        return items
+
+    def state(self) -> dict:
+        return {"summary": self.summary, "recent": self.recent, "summary_input_tokens": self.summary_input_tokens}
+
+    def restore(self, state: dict) -> None:
+        self.summary = state["summary"]
+        self.recent = [tuple(item) for item in state["recent"]]
+        self.summary_input_tokens = state["summary_input_tokens"]
+
+    async def add(self, speaker: str, contribution: str) -> None:
+        self.recent.append((speaker, contribution))
+        # fold in batches, so the summarizer is called only once per `window` contributions
+        if len(self.recent) >= 2 * self.window:
+            folded, self.recent = self.recent[:self.window], self.recent[self.window:]
+            await self._fold(folded)
+
+    async def _fold(self, contributions: list[tuple[str, str]]) -> None:
+        new_contributions = "\n".join(f"=== {speaker}:\n{text}" for speaker, text in contributions)
+        summarizer_input = f"Summary so far:\n{self.summary or '(none)'}\n\nNew contributions:\n{new_contributions}"
+        result = await Runner.run(self.summarizer, input=summarizer_input)
+        self.summary = result.final_output
+        self.summary_input_tokens += result.context_wrapper.usage.input_tokens
+
+LIBERTARIAN = {"name": "Libertarian", "instructions": """
         You are David Friedman, a libertarian economist and philosopher.
         Your goal is, to convince your discussion partner, that libertarianism is the superior system for societies.
         Initially, you only talk about the advantages of libertarianism.
         As soon as there are arguments against libertarianism, you come up with convincing counter arguments.
-        """ + general_rules)
-    communist = Agent(name="Communist", instructions="""
+        """}
+COMMUNIST = {"name": "Communist", "instructions": """
         You are Friedrich Engels, a communist philosopher, social scientist, and co-author of The Communist Manifesto.
         Your goal is, to convince your discussion partner, that communism is the superior system for societies.
         Initially, you only talk about the advantages of communism.
         As soon as there are arguments against communism, you come up with convincing counter arguments.
-         """ + general_rules)
+         """}
+
+class Checkpoint:
+    """
+    Append-only JSONL file with the configuration hash of a debate, followed by each completed turn
+    including the state of the debate context after that turn.
+    """
+
+    def __init__(self, path: str, config_hash: str):
+        self.path = path
+        self.config_hash = config_hash
+
+    def load(self) -> list[dict]:
+        """Load the completed turns, verifying that the checkpoint belongs to the same configuration."""
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        valid_bytes = 0 # end of the last complete record
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # a partially written last line is not a completed turn
+                try:
+                    records.append(json.loads(line))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    break
+                valid_bytes += len(line)
+        if not records or records[0].get("config_hash") != self.config_hash:
+            raise ValueError(f"checkpoint {self.path} was created with a different configuration")
+        if valid_bytes < os.path.getsize(self.path):
+            # cut off the torn line, the turns appended after resuming must start on a line of their own
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_bytes)
+                os.fsync(f.fileno())
+        return [r for r in records[1:] if r.get("type") == "turn"]
+
+    def start(self) -> None:
+        """Start a new checkpoint, discarding an existing one."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "config", "config_hash": self.config_hash}) + "\n")
+
+    def append(self, record: dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"type": "turn", **record}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def model_id(model) -> str | None:
+    """Identity of a model which is stable across runs, unlike the default repr of a model object with its address."""
+    if model is None or isinstance(model, str):
+        return model
+    # OpenAI models keep their name in `model`, StubModel in `name`
+    return f"{type(model).__name__}:{getattr(model, 'model', None) or getattr(model, 'name', None)}"
+
+def config_hash(*agents: Agent, **settings) -> str:
+    """Hash of everything which determines the contributions of a debate, except the number of rounds."""
+    config = {
+        "agents": [{"name": a.name, "instructions": a.instructions, "model": model_id(a.model)} for a in agents],
+        **settings
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+def create_debater(persona: dict, topic: str = TOPIC, language: str = LANGUAGE, model=None) -> Agent:
+    """Create a participant of the debate from a persona with a name and instructions, using the default or given model."""
+    general_rules = f"""
+        Let's discuss the topic {topic}.
+        Please keep your contributions to the discussion short, no more than 2 short sentences in a single contribution.
+        Always try to falsify the claims of the other participant(s).
+        But please stay friendly and open to other opinions.
+        Contributions longer than 2 sentences are strictly forbidden.
+        Add a single line break after each sentence.
+        Do not start your contribution with any kind of headline.
+        Output all texts in {language}.
+        """
+    return Agent(name=persona["name"], instructions=persona["instructions"] + general_rules, model=model)
+
+def create_debaters(topic: str = TOPIC, language: str = LANGUAGE,
+                    personas: tuple[dict, dict] = (COMMUNIST, LIBERTARIAN), model_factory=None) -> tuple[Agent, Agent]:
+    """Create the two participants of the debate, the one who begins comes first, optionally with models from `model_factory`."""
+    return tuple(create_debater(p, topic, language, model_factory() if model_factory else None) for p in personas)
+
+def create_summarizer(language: str = LANGUAGE, model=None) -> Agent:
+    """Create the agent which folds older contributions into the rolling summary."""
+    return Agent(name="Summarizer", model=model, instructions=f"""
+        You maintain a rolling summary of a discussion.
+        You get the summary so far and some new contributions.
+        Reply with an updated summary which keeps the main arguments of each participant
+        and which claims have already been countered.
+        Keep the summary below 120 words, in {language}, without any headline.
+        """)
 
-    conversation = textwrap.dedent(f"""\
+def opening(topic: str, first: Agent) -> str:
+    return textwrap.dedent(f"""\
         === Moderator:
-        Let's discuss the topic libertarianism vs. communism.
-        {communist.name}, would you like to begin?
+        Let's discuss the topic {topic}.
+        {first.name}, would you like to begin?
         """)
-    print(conversation)
-    for i in range(10):
-        communist_contribution = (await Runner.run(communist, input=conversation)).final_output.replace("\n\n", "\n")
-        enhanced_contribution = f"\n=== {communist.name}:\n{communist_contribution}"
-        print(enhanced_contribution)
-        conversation += enhanced_contribution
-
-        libertarian_contribution = (await Runner.run(libertarian, input=conversation)).final_output.replace("\n\n", "\n")
-        enhanced_contribution = f"\n=== {libertarian.name}:\n{libertarian_contribution}"
-        print(enhanced_contribution)
-        conversation += enhanced_contribution
+
+class NewlineCollapser:
+    """
+    Applies .replace("\\n\\n", "\\n") incrementally to a stream of text fragments.
+
+    Of a run of n newlines, the replacement keeps ceil(n/2), i.e. every odd one,
+    so each fragment can be emitted immediately without buffering.
+    """
+
+    def __init__(self):
+        self.newlines = 0
+
+    def feed(self, text: str) -> str:
+        out = []
+        for c in text:
+            if c == "\n":
+                self.newlines += 1
+                if self.newlines % 2 == 0:
+                    continue
+            else:
+                self.newlines = 0
+            out.append(c)
+        return "".join(out)
+
+def print_contribution(round: int, agent: Agent, contribution: str, usage, ttft: float | None = None) -> None:
+    print(f"\n=== {agent.name}:\n{contribution}")
+
+class StreamPrinter:
+    """Prints each contribution token by token as it arrives, and its time to first token on stderr."""
+
+    def __init__(self):
+        self.speaker = None
+
+    def on_delta(self, agent: Agent, text: str) -> None:
+        if self.speaker is not agent:
+            self.speaker = agent
+            print(f"\n=== {agent.name}:")
+        print(text, end="", flush=True)
+
+    def on_contribution(self, round: int, agent: Agent, contribution: str, usage, ttft: float | None = None) -> None:
+        self.speaker = None
+        print()
+        if ttft is not None:
+            print(f"[{agent.name}, round {round + 1}: time to first token {ttft:.2f}s]", file=sys.stderr)
+
+async def stream_turn(agent: Agent, input, on_delta) -> tuple:
+    """
+    Run a single turn with the streamed runner, passing normalized text fragments to `on_delta`.
+
+    Returns:
+        (contribution, usage, time to first token in seconds)
+    """
+    started = time.perf_counter()
+    ttft = None
+    collapser = NewlineCollapser()
+    result = Runner.run_streamed(agent, input=input)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            on_delta(agent, collapser.feed(event.data.delta))
+    return result.final_output.replace("\n\n", "\n"), result.context_wrapper.usage, ttft
+
+async def run_debate(first: Agent, second: Agent, context, rounds: int = ROUNDS,
+                     on_contribution=print_contribution, on_delta=None, start_turn: int = 0) -> dict:
+    """
+    Run the debate and pass each contribution to `on_contribution` (printed by default).
+    If `on_delta` is given, the turns are streamed and each text fragment is passed to it as it arrives.
+    With `start_turn`, the debate continues after that many already completed turns.
+
+    Returns:
+        token usage of the participants (without summarization) and the times to first token
+    """
+    input_tokens = 0
+    output_tokens = 0
+    ttfts = []
+    for turn in range(start_turn, 2 * rounds):
+        i, agent = turn // 2, (first, second)[turn % 2]
+        if on_delta:
+            contribution, usage, ttft = await stream_turn(agent, context.input_for(agent), on_delta)
+            ttfts.append(ttft)
+        else:
+            result = await Runner.run(agent, input=context.input_for(agent))
+            contribution, usage, ttft = result.final_output.replace("\n\n", "\n"), result.context_wrapper.usage, None
+        await context.add(agent.name, contribution)
+        on_contribution(i, agent, contribution, usage, ttft)
+        input_tokens += usage.input_tokens
+        output_tokens += usage.output_tokens
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "ttfts": ttfts}
+
+async def main():
+    parser = argparse.ArgumentParser(description="Debate between two AI agents")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="number of rounds, each participant contributes once per round")
+    parser.add_argument("--window", type=int, default=WINDOW, help="number of latest contributions sent verbatim, older ones are summarized")
+    parser.add_argument("--full-transcript", action="store_true", help="send the complete transcript in every turn (quadratic token usage)")
+    parser.add_argument("--stream", action="store_true", help="print tokens as they arrive and report the time to first token")
+    parser.add_argument("--checkpoint", default="debate.checkpoint.jsonl", help="file each completed turn is appended to")
+    parser.add_argument("--resume", action="store_true", help="continue after the last completed turn of the checkpoint")
+    parser.add_argument("--stub", action="store_true", help="use a local stub instead of a real model, see stub_model.py")
+    parser.add_argument("--topic", default=TOPIC)
+    parser.add_argument("--language", default=LANGUAGE)
+    args = parser.parse_args()
+
+    load_dotenv()
+    model_factory = StubModel if args.stub else None
+    if args.stub:
+        set_tracing_disabled(True)
+    communist, libertarian = create_debaters(args.topic, args.language, model_factory=model_factory)
+    moderator = opening(args.topic, communist)
+    if args.full_transcript:
+        agents = (communist, libertarian)
+        context = TranscriptContext(moderator)
+    else:
+        agents = (communist, libertarian, create_summarizer(args.language, model_factory() if model_factory else None))
+        context = DebateContext(moderator, agents[2], args.window)
+
+    checkpoint = Checkpoint(args.checkpoint, config_hash(
+        *agents, topic=args.topic, language=args.language, context=type(context).__name__, window=args.window))
+    try:
+        completed = checkpoint.load() if args.resume else []
+    except ValueError as e:
+        sys.exit(f"cannot resume: {e}")
+    if not completed:
+        checkpoint.start()
+
+    print(moderator)
+    for record in completed:
+        print(f"\n=== {record['speaker']}:\n{record['text']}")
+    if completed:
+        context.restore(completed[-1]["context"])
+        print(f"\n[resumed after {len(completed)} completed turns]", file=sys.stderr)
+
+    printer = StreamPrinter() if args.stream else None
+    show = printer.on_contribution if printer else print_contribution
+
+    def on_contribution(round, agent, contribution, usage, ttft=None):
+        show(round, agent, contribution, usage, ttft)
+        checkpoint.append({"round": round, "speaker": agent.name, "text": contribution, "input_tokens": usage.input_tokens,
+                           "output_tokens": usage.output_tokens, "context": context.state()})
+
+    usage = await run_debate(communist, libertarian, context, args.rounds, on_contribution,
+                             printer.on_delta if printer else None, start_turn=len(completed))
+    usage["input_tokens"] += sum(r["input_tokens"] for r in completed)
+    usage["output_tokens"] += sum(r["output_tokens"] for r in completed)
+    print(f"\ninput tokens: {usage['input_tokens']}, output tokens: {usage['output_tokens']}")
+    if isinstance(context, DebateContext):
+        print(f"summarizer input tokens: {context.summary_input_tokens}")
+    ttfts = [t for t in usage["ttfts"] if t is not None]
+    if ttfts:
+        print(f"time to first token: min {min(ttfts):.2f}s, avg {sum(ttfts) / len(ttfts):.2f}s, max {max(ttfts):.2f}s")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Offline benchmark of the debate context strategies, using the stub model.
+
+Usage:
+    python src/benchmark.py [--rounds 10] [--windows 2 4] [--first-token-latency 0.05]
+                            [--input-tokens-per-second 20000] [--output-tokens-per-second 100] [--stream]
+
+Reports per-round input tokens (showing their growth), per-turn latency and total runtime
+of the full-transcript approach compared to the incremental context with several windows.
+"""
+import argparse
+import asyncio
+import time
+from agents import set_tracing_disabled
+
+from agentic_chat import (TOPIC, LANGUAGE, DebateContext, TranscriptContext, create_debaters,
+                          create_summarizer, opening, run_debate)
+from stub_model import StubModel
+
+async def benchmark(name: str, window: int | None, rounds: int, stub_args: dict, stream: bool) -> dict:
+    """Run a single debate with stub models and collect per-turn measurements."""
+    model_factory = lambda: StubModel(**stub_args)
+    first, second = create_debaters(TOPIC, LANGUAGE, model_factory=model_factory)
+    moderator = opening(TOPIC, first)
+    if window is None:
+        context = TranscriptContext(moderator)
+    else:
+        context = DebateContext(moderator, create_summarizer(LANGUAGE, model_factory()), window)
+
+    round_input_tokens = [0] * rounds
+    latencies = []
+    last = time.perf_counter()
+
+    def on_contribution(round, agent, contribution, usage, ttft=None):
+        nonlocal last
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+        round_input_tokens[round] += usage.input_tokens
+
+    started = time.perf_counter()
+    usage = await run_debate(first, second, context, rounds, on_contribution,
+                             (lambda agent, text: None) if stream else None)
+    ttfts = [t for t in usage["ttfts"] if t is not None]
+    return {
+        "name": name,
+        "runtime": time.perf_counter() - started,
+        "round_input_tokens": round_input_tokens,
+        "input_tokens": usage["input_tokens"] + getattr(context, "summary_input_tokens", 0),
+        "output_tokens": usage["output_tokens"],
+        "mean_latency": sum(latencies) / len(latencies),
+        "max_latency": max(latencies),
+        "mean_ttft": sum(ttfts) / len(ttfts) if ttfts else None,
+    }
+
+def print_results(results: list[dict], rounds: int) -> None:
+    names = [r["name"] for r in results]
+    print("input tokens per round:")
+    print(f"{'round':>5}  " + "  ".join(f"{n:>16}" for n in names))
+    for i in range(rounds):
+        print(f"{i + 1:>5}  " + "  ".join(f"{r['round_input_tokens'][i]:>16}" for r in results))
+    print()
+    print(f"{'approach':<16} {'runtime':>9} {'turn avg':>9} {'turn max':>9} {'ttft avg':>9} {'input tok':>10} {'output tok':>10}")
+    for r in results:
+        ttft = f"{r['mean_ttft']:.3f}s" if r["mean_ttft"] is not None else "-"
+        print(f"{r['name']:<16} {r['runtime']:>8.2f}s {r['mean_latency']:>8.3f}s {r['max_latency']:>8.3f}s "
+              f"{ttft:>9} {r['input_tokens']:>10} {r['output_tokens']:>10}")
+
+async def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the debate context strategies")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--windows", type=int, nargs="*", default=[2, 4], help="windows of the incremental contexts to compare")
+    parser.add_argument("--first-token-latency", type=float, default=0.0, help="simulated fixed latency per request in seconds")
+    parser.add_argument("--input-tokens-per-second", type=float, default=0.0, help="simulated prompt processing speed (0 = instant)")
+    parser.add_argument("--output-tokens-per-second", type=float, default=0.0, help="simulated generation speed (0 = instant)")
+    parser.add_argument("--stream", action="store_true", help="use the streamed runner and measure the time to first token")
+    args = parser.parse_args()
+
+    stub_args = {
+        "first_token_latency": args.first_token_latency,
+        "input_tokens_per_second": args.input_tokens_per_second,
+        "output_tokens_per_second": args.output_tokens_per_second,
+    }
+    set_tracing_disabled(True) # nothing to trace offline
+    approaches = [("full-transcript", None)] + [(f"window-{w}", w) for w in args.windows]
+    results = [await benchmark(name, window, args.rounds, stub_args, args.stream) for name, window in approaches]
+    print_results(results, args.rounds)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,122 @@
+"""
+Offline stand-in for the LLM behind the debate agents.
+
+Returns deterministic, templated replies with configurable latency and token counts,
+so debates can be measured and regression-tested without calling a real model.
+
+Use it per agent, e.g. Agent(..., model=StubModel()), or for a whole run via
+RunConfig(model_provider=StubModelProvider()).
+"""
+import asyncio
+import itertools
+import time
+from agents import Model, ModelProvider, ModelResponse, Usage
+from openai.types.responses import (Response, ResponseCompletedEvent, ResponseCreatedEvent,
+                                    ResponseOutputMessage, ResponseOutputText, ResponseTextDeltaEvent,
+                                    ResponseUsage)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+REPLIES = [
+    "This is contribution number {turn}.\n\nIt contains exactly two sentences.",
+    "I disagree with the last argument.\n\nMy input had {input_tokens} tokens.",
+]
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens of a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+class StubModel(Model):
+    """
+    Deterministic model returning templated replies.
+
+    The simulated latency is: first_token_latency + input_tokens / input_tokens_per_second
+    until the first token, plus output_tokens / output_tokens_per_second for the rest,
+    so approaches sending more input also take longer, as with a real model.
+    """
+
+    def __init__(self, replies: list[str] = REPLIES, first_token_latency: float = 0.0,
+                 input_tokens_per_second: float = 0.0, output_tokens_per_second: float = 0.0,
+                 output_tokens: int | None = None, name: str = "stub"):
+        """
+        Args:
+            replies: reply templates used in turn, with {name}, {turn} and {input_tokens} placeholders
+            first_token_latency: fixed latency in seconds until the first token
+            input_tokens_per_second: simulated prompt processing speed (0 = instant)
+            output_tokens_per_second: simulated generation speed (0 = instant)
+            output_tokens: reported output tokens per reply, estimated from the reply if None
+            name: model name reported in responses
+        """
+        self.replies = replies
+        self.first_token_latency = first_token_latency
+        self.input_tokens_per_second = input_tokens_per_second
+        self.output_tokens_per_second = output_tokens_per_second
+        self.output_tokens = output_tokens
+        self.name = name
+        self.turns = itertools.count(1)
+
+    def _reply(self, system_instructions: str | None, input) -> tuple[str, int, int]:
+        if not isinstance(input, str):
+            input = "\n".join(str(item.get("content", "")) if isinstance(item, dict) else str(item) for item in input)
+        prompt = (system_instructions or "") + input
+        input_tokens = estimate_tokens(prompt)
+        turn = next(self.turns)
+        template = self.replies[(turn - 1) % len(self.replies)]
+        text = template.format(name=self.name, turn=turn, input_tokens=input_tokens)
+        output_tokens = self.output_tokens if self.output_tokens is not None else estimate_tokens(text)
+        return text, input_tokens, output_tokens
+
+    def _time_to_first_token(self, input_tokens: int) -> float:
+        prefill = input_tokens / self.input_tokens_per_second if self.input_tokens_per_second else 0.0
+        return self.first_token_latency + prefill
+
+    def _generation_time(self, output_tokens: int) -> float:
+        return output_tokens / self.output_tokens_per_second if self.output_tokens_per_second else 0.0
+
+    @staticmethod
+    def _message(text: str) -> ResponseOutputMessage:
+        return ResponseOutputMessage.model_construct(
+            id="stub-message", type="message", role="assistant", status="completed",
+            content=[ResponseOutputText.model_construct(type="output_text", text=text, annotations=[])])
+
+    async def get_response(self, system_instructions, input, *args, **kwargs) -> ModelResponse:
+        text, input_tokens, output_tokens = self._reply(system_instructions, input)
+        await asyncio.sleep(self._time_to_first_token(input_tokens) + self._generation_time(output_tokens))
+        return ModelResponse(
+            output=[self._message(text)],
+            usage=Usage(requests=1, input_tokens=input_tokens, output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens),
+            response_id=None)
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        text, input_tokens, output_tokens = self._reply(system_instructions, input)
+        response = Response.model_construct(
+            id="stub-response", created_at=time.time(), model=self.name, object="response", output=[],
+            tool_choice="auto", tools=[], parallel_tool_calls=False)
+        yield ResponseCreatedEvent.model_construct(type="response.created", response=response, sequence_number=0)
+        await asyncio.sleep(self._time_to_first_token(input_tokens))
+
+        words = text.split(" ")
+        for n, word in enumerate(words):
+            delta = word if n == 0 else " " + word
+            if n > 0:
+                await asyncio.sleep(self._generation_time(output_tokens) / len(words))
+            yield ResponseTextDeltaEvent.model_construct(
+                type="response.output_text.delta", item_id="stub-message", output_index=0,
+                content_index=0, delta=delta, logprobs=[], sequence_number=n + 1)
+
+        response.output = [self._message(text)]
+        response.usage = ResponseUsage.model_construct(
+            input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens,
+            input_tokens_details=InputTokensDetails.model_construct(cached_tokens=0),
+            output_tokens_details=OutputTokensDetails.model_construct(reasoning_tokens=0))
+        yield ResponseCompletedEvent.model_construct(type="response.completed", response=response,
+                                                     sequence_number=len(words) + 1)
+
+class StubModelProvider(ModelProvider):
+    """Provides a StubModel for every model name, configured with the given arguments."""
+
+    def __init__(self, **stub_args):
+        self.stub_args = stub_args
+
+    def get_model(self, model_name: str | None) -> Model:
+        return StubModel(name=model_name or "stub", **self.stub_args)
@@ -0,0 +1,117 @@
+"""
+Runs many debates (topic x language x pairing of personas) concurrently.
+
+Usage:
+    python src/tournament.py tournament.example.yaml --out debates.jsonl
+
+Each contribution is appended to the JSONL output as soon as it is complete,
+followed by a summary line per debate with its wall time and token totals.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from dotenv import load_dotenv
+
+from agentic_chat import (ROUNDS, WINDOW, COMMUNIST, LIBERTARIAN, DebateContext, TranscriptContext,
+                          create_debaters, create_summarizer, opening, run_debate)
+
+def load_matrix(path: str) -> dict:
+    """Load the tournament configuration from a YAML or JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml # only needed for YAML configurations
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def expand_matrix(matrix: dict) -> list[dict]:
+    """Expand the configuration into a list of single debates."""
+    pairings = matrix.get("pairings") or [[COMMUNIST, LIBERTARIAN]]
+    return [
+        {"id": f"{n:03d}", "topic": topic, "language": language, "personas": tuple(pairing)}
+        for n, (topic, language, pairing) in enumerate(
+            itertools.product(matrix["topics"], matrix.get("languages", ["English"]), pairings))
+    ]
+
+class JsonlWriter:
+    """Appends records to a JSONL file, flushed after each record, so partial results survive a crash."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, record: dict) -> None:
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+async def run_one(debate: dict, semaphore: asyncio.Semaphore, writer: JsonlWriter,
+                  rounds: int, window: int, full_transcript: bool) -> dict:
+    async with semaphore:
+        first, second = create_debaters(debate["topic"], debate["language"], debate["personas"])
+        moderator = opening(debate["topic"], first)
+        if full_transcript:
+            context = TranscriptContext(moderator)
+        else:
+            context = DebateContext(moderator, create_summarizer(debate["language"]), window)
+
+        # summed here as well, so a failed debate still reports the tokens of its completed contributions
+        spent = {"input_tokens": 0, "output_tokens": 0}
+
+        def on_contribution(round, agent, contribution, usage, ttft=None):
+            spent["input_tokens"] += usage.input_tokens
+            spent["output_tokens"] += usage.output_tokens
+            writer.write({"debate": debate["id"], "round": round, "speaker": agent.name, "text": contribution,
+                          "input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens})
+
+        started = time.perf_counter()
+        try:
+            usage = await run_debate(first, second, context, rounds, on_contribution)
+            error = None
+        except Exception as e:
+            usage, error = spent, repr(e)
+        summary = {
+            "debate": debate["id"], "type": "summary", "topic": debate["topic"], "language": debate["language"],
+            "personas": [p["name"] for p in debate["personas"]], "seconds": round(time.perf_counter() - started, 3),
+            "summarizer_input_tokens": getattr(context, "summary_input_tokens", 0), "error": error,
+            "input_tokens": usage["input_tokens"], "output_tokens": usage["output_tokens"]
+        }
+        writer.write(summary)
+        print(f"{debate['id']} {summary['seconds']:>8.1f}s  in {summary['input_tokens']:>7}  "
+              f"out {summary['output_tokens']:>6}  {debate['language']:<8} {debate['topic']}"
+              + (f"  FAILED: {error}" if error else ""))
+        return summary
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a matrix of debates concurrently")
+    parser.add_argument("matrix", help="YAML or JSON file with topics, languages and pairings of personas")
+    parser.add_argument("--out", default="debates.jsonl", help="JSONL file the transcripts are appended to")
+    parser.add_argument("--concurrency", type=int, help="maximum number of debates running at the same time")
+    parser.add_argument("--full-transcript", action="store_true", help="send the complete transcript in every turn")
+    args = parser.parse_args()
+
+    load_dotenv()
+    matrix = load_matrix(args.matrix)
+    debates = expand_matrix(matrix)
+    semaphore = asyncio.Semaphore(args.concurrency or matrix.get("concurrency", 4))
+    rounds = matrix.get("rounds", ROUNDS)
+    window = matrix.get("window", WINDOW)
+
+    print(f"running {len(debates)} debates with {rounds} rounds each")
+    writer = JsonlWriter(args.out)
+    started = time.perf_counter()
+    try:
+        summaries = await asyncio.gather(
+            *(run_one(debate, semaphore, writer, rounds, window, args.full_transcript) for debate in debates))
+    finally:
+        writer.close()
+
+    print(f"\n{len(summaries)} debates in {time.perf_counter() - started:.1f}s, "
+          f"{sum(1 for s in summaries if s['error'])} failed, "
+          f"input tokens: {sum(s['input_tokens'] + s['summarizer_input_tokens'] for s in summaries)}, "
+          f"output tokens: {sum(s['output_tokens'] for s in summaries)}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
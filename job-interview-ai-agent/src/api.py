@@ -0,0 +1,186 @@
+"""
+Headless JSON and Server-Sent Events API for the Job Interview AI Agent.
+
+A lightweight alternative to the Gradio UI for own integrations, e.g. a chat widget on a static page:
+no frontend assets, no websocket queue, just one request per chat turn.
+The embedding page is responsible for the privacy notice and consent, which the Gradio UI shows itself.
+
+    POST /api/chat                {"message": "...", "session_id": "..."}  -> ChatResponse as JSON
+    POST /api/chat/stream         same request -> text/event-stream with
+                                  'stage' events while the pipeline runs, then 'token' events with the reply
+                                  and a final 'done' event with the ChatResponse
+    POST /api/{persona}/chat[/stream]  the same for the persona served at /{persona}
+
+Either the history is sent with every request (stateless), or only the session_id returned by the
+first reply, then the history is kept on the server. Session ids are issued by the server,
+an unknown one starts a new session. Clients can easily start new sessions, so the token budget
+is accounted per client address instead.
+"""
+import asyncio
+import json
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from .interview import InterviewAgent
+from .models import ChatRequest, ChatResponse, StageStats, MAX_HISTORY_MESSAGES, MAX_HISTORY_CHARS
+from .turn import Turn
+
+class SessionStore:
+    """Thread-safe chat histories per session, for clients which do not send the history themselves."""
+
+    def __init__(self, max_sessions: int = 1000, max_messages: int = MAX_HISTORY_MESSAGES,
+                 max_chars: int = MAX_HISTORY_CHARS):
+        """
+        Args:
+            max_sessions: number of sessions to keep, the least recently used are dropped
+            max_messages: number of messages to keep per session, older ones are dropped
+            max_chars: number of characters to keep per session, older messages are dropped
+        """
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._histories: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._histories
+
+    def history(self, session_id: str) -> List[Dict[str, str]]:
+        """Get a copy of the history of the given session, empty if unknown."""
+        with self._lock:
+            return list(self._histories.get(session_id, []))
+
+    def append(self, session_id: str, history: List[Dict[str, str]], message: str, reply: str) -> None:
+        """Store the history of the given session, extended by the latest message and reply."""
+        with self._lock:
+            history = history + [{"role": "user", "content": message}, {"role": "assistant", "content": reply}]
+            history = history[-self.max_messages:]
+            while len(history) > 1 and sum(len(m["content"]) for m in history) > self.max_chars:
+                history = history[1:]
+            self._histories[session_id] = history
+            self._histories.move_to_end(session_id)
+            while len(self._histories) > self.max_sessions:
+                self._histories.popitem(last=False)
+
+# reply chunks of the token stream: words with their trailing whitespace
+_TOKEN_RE = re.compile(r"\s*\S+\s*")
+
+def client_address(request: Request) -> str:
+    """
+    Address of the client of a request. Behind the local reverse proxy (see .htaccess) it is the last
+    X-Forwarded-For entry, the one appended by the proxy, earlier entries can be set by the client.
+    """
+    host = request.client.host if request.client else ""
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and host in ("127.0.0.1", "::1"):
+        return forwarded.split(",")[-1].strip()
+    return host
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def create_api_router(agents: Dict[str, InterviewAgent], sessions: Optional[SessionStore] = None) -> APIRouter:
+    """
+    Create the API routes for the given agents, keyed by their persona path ("" for the root persona).
+
+    The routes use the same agent instances as the Gradio UI, and thus the same LLM clients and token budget.
+    """
+    sessions = sessions if sessions else SessionStore()
+    router = APIRouter(prefix="/api")
+
+    def agent_for(persona: str) -> InterviewAgent:
+        agent = agents.get(persona.strip("/"))
+        if not agent:
+            raise HTTPException(status_code=404, detail=f"unknown persona '{persona}'")
+        return agent
+
+    def prepare(request: ChatRequest) -> tuple:
+        if request.session_id and sessions.exists(request.session_id):
+            session_id = request.session_id
+        else:
+            session_id = uuid.uuid4().hex
+        if request.history is not None:
+            history = [m.model_dump() for m in request.history]
+        else:
+            history = sessions.history(session_id)
+        return session_id, history
+
+    def finish(request: ChatRequest, session_id: str, history: List[Dict[str, str]],
+               reply: str, turn: Turn) -> ChatResponse:
+        sessions.append(session_id, history, request.message, reply)
+        return ChatResponse(
+            reply=reply,
+            session_id=session_id,
+            language=turn.metadata.language if turn.metadata else None,
+            stages=turn.stages
+        )
+
+    async def chat(agent: InterviewAgent, request: ChatRequest, client: str) -> ChatResponse:
+        session_id, history = prepare(request)
+        turn = Turn(agent.persona, f"api:{client}")
+        # the pipeline blocks on the LLM calls, so it runs in a worker thread like in the Gradio UI,
+        # from anyio's pool (40 threads), asyncio's default pool can be as small as 5 threads
+        reply = await run_in_threadpool(agent.chat, request.message, history, turn)
+        return finish(request, session_id, history, reply, turn)
+
+    def chat_stream(agent: InterviewAgent, request: ChatRequest, client: str) -> StreamingResponse:
+        session_id, history = prepare(request)
+
+        async def events() -> AsyncIterator[str]:
+            loop = asyncio.get_running_loop()
+            stages: asyncio.Queue = asyncio.Queue()
+
+            def on_stage(stats: StageStats) -> None:
+                loop.call_soon_threadsafe(stages.put_nowait, stats)
+
+            turn = Turn(agent.persona, f"api:{client}", on_stage=on_stage)
+            task = asyncio.ensure_future(run_in_threadpool(agent.chat, request.message, history, turn))
+            yield _sse("session", {"session_id": session_id})
+            while not task.done():
+                # the answer is only final after the evaluation, so until then the stages show the progress
+                waiter = asyncio.ensure_future(stages.get())
+                await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+                if waiter.done():
+                    yield _sse("stage", waiter.result().model_dump())
+                else:
+                    waiter.cancel()
+            while not stages.empty():
+                yield _sse("stage", stages.get_nowait().model_dump())
+            try:
+                reply = task.result()
+            except Exception as e:
+                print(f"[{agent.persona}] api: chat failed: {e!r}")
+                yield _sse("error", {"detail": "the reply could not be generated"})
+                return
+            for token in _TOKEN_RE.findall(reply):
+                yield _sse("token", token)
+            yield _sse("done", finish(request, session_id, history, reply, turn).model_dump())
+
+        return StreamingResponse(events(), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+    @router.post("/chat", response_model=ChatResponse)
+    async def chat_default(request: ChatRequest, http_request: Request) -> ChatResponse:
+        return await chat(agent_for(""), request, client_address(http_request))
+
+    @router.post("/chat/stream")
+    async def chat_stream_default(request: ChatRequest, http_request: Request) -> StreamingResponse:
+        return chat_stream(agent_for(""), request, client_address(http_request))
+
+    @router.post("/{persona}/chat", response_model=ChatResponse)
+    async def chat_persona(persona: str, request: ChatRequest, http_request: Request) -> ChatResponse:
+        return await chat(agent_for(persona), request, client_address(http_request))
+
+    @router.post("/{persona}/chat/stream")
+    async def chat_stream_persona(persona: str, request: ChatRequest, http_request: Request) -> StreamingResponse:
+        return chat_stream(agent_for(persona), request, client_address(http_request))
+
+    return router
@@ -0,0 +1,81 @@
+"""
+Token accounting and budgets for the Job Interview AI Agent.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Optional
+
+from .config import settings
+
+# budget levels, from cheapest to most expensive handling
+NORMAL = "normal"
+ECONOMY = "economy"
+EXHAUSTED = "exhausted"
+
+class TokenBudget:
+    """Thread-safe token accounting per session and per day."""
+
+    def __init__(self, session_soft_limit: int = settings.SESSION_TOKEN_SOFT_LIMIT,
+                 session_hard_limit: int = settings.SESSION_TOKEN_HARD_LIMIT,
+                 daily_soft_limit: int = settings.DAILY_TOKEN_SOFT_LIMIT,
+                 daily_hard_limit: int = settings.DAILY_TOKEN_HARD_LIMIT,
+                 max_sessions: int = 10000):
+        """
+        Args:
+            session_soft_limit: tokens per session before switching to the economy level (0 = unlimited)
+            session_hard_limit: tokens per session before the budget is exhausted (0 = unlimited)
+            daily_soft_limit: tokens per day before switching to the economy level (0 = unlimited)
+            daily_hard_limit: tokens per day before the budget is exhausted (0 = unlimited)
+            max_sessions: number of sessions to keep track of, the least recently used are dropped
+        """
+        self.session_soft_limit = session_soft_limit
+        self.session_hard_limit = session_hard_limit
+        self.daily_soft_limit = daily_soft_limit
+        self.daily_hard_limit = daily_hard_limit
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, int]" = OrderedDict()
+        self._day = date.today()
+        self._daily_tokens = 0
+
+    def level(self, session_id: Optional[str]) -> str:
+        """Determine the budget level for the next turn of the given session."""
+        with self._lock:
+            self._roll_over()
+            session_tokens = self._sessions.get(session_id, 0) if session_id else 0
+            if self._exceeds(session_tokens, self.session_hard_limit) or \
+                    self._exceeds(self._daily_tokens, self.daily_hard_limit):
+                return EXHAUSTED
+            if self._exceeds(session_tokens, self.session_soft_limit) or \
+                    self._exceeds(self._daily_tokens, self.daily_soft_limit):
+                return ECONOMY
+            return NORMAL
+
+    def charge(self, session_id: Optional[str], tokens: int) -> None:
+        """Account the tokens used by a turn of the given session."""
+        with self._lock:
+            self._roll_over()
+            self._daily_tokens += tokens
+            if session_id:
+                self._sessions[session_id] = self._sessions.get(session_id, 0) + tokens
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            session_tokens = self._sessions.get(session_id, 0) if session_id else 0
+            print(f"budget: +{tokens} tokens, session {session_id}: {session_tokens}, "
+                  f"day {self._day}: {self._daily_tokens}")
+
+    def _roll_over(self) -> None:
+        today = date.today()
+        if today != self._day:
+            print(f"budget: day {self._day} closed with {self._daily_tokens} tokens")
+            self._day = today
+            self._daily_tokens = 0
+
+    @staticmethod
+    def _exceeds(tokens: int, limit: int) -> bool:
+        return limit > 0 and tokens >= limit
+
+# Global budget, shared by all personas served from this process
+token_budget = TokenBudget()
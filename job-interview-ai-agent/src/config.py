@@ -1,7 +1,7 @@
 """
 Configuration management for the Job Interview AI Agent.
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 import os
@@ -15,6 +15,11 @@ class LLMConfig(BaseModel):
     model_name: str
     base_url: str | None = None
 
+class PersonaConfig(BaseModel):
+    """Configuration for a persona served under its own URL path."""
+    name: str
+    local_data: str | None = None
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     GRADIO_PORT: int = 7860
@@ -27,6 +32,11 @@ class Settings(BaseSettings):
     LOCAL_DATA: str | None = None
     PROD_TARGET: str | None = None
 
+    # Personas served from this process, keyed by URL path, e.g. as JSON in .env:
+    # PERSONAS={"michael": {"name": "Michael", "local_data": "~/interview-data/michael"}}
+    # If empty, a single persona from NAME and LOCAL_DATA is served at the root path.
+    PERSONAS: Dict[str, PersonaConfig] = {}
+
     PUSHOVER_USER: str | None = os.getenv("PUSHOVER_USER")
     PUSHOVER_TOKEN: str | None = os.getenv("PUSHOVER_TOKEN")
     PUSHOVER_URL: str = "https://api.pushover.net/1/messages.json"
@@ -51,6 +61,30 @@ class Settings(BaseSettings):
         base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
     )
     
+    # Cheaper/faster generator used once a session or the day exceeds its soft token limit
+    answer_generator_economy: LLMConfig = LLMConfig(
+        api_key=os.getenv("OPENAI_API_KEY", ""),
+        model_name="gpt-4.1-nano",
+        base_url=None
+    )
+
+    # Token budgets per session and per day (0 = unlimited):
+    # above the soft limit, the economy generator is used and the evaluation is skipped (if configured),
+    # at the hard limit, no more LLM calls are made and a polite message is returned instead.
+    SESSION_TOKEN_SOFT_LIMIT: int = 30000
+    SESSION_TOKEN_HARD_LIMIT: int = 100000
+    DAILY_TOKEN_SOFT_LIMIT: int = 2000000
+    DAILY_TOKEN_HARD_LIMIT: int = 5000000
+    ECONOMY_SKIPS_EVALUATION: bool = True
+    
+    # Deadline for a complete chat turn, every stage gets its timeout from the remaining time:
+    # required stages (metadata, generation) need at least MIN_STAGE_SECONDS,
+    # optional stages (evaluation, regeneration) are skipped below OPTIONAL_STAGE_SECONDS.
+    CHAT_DEADLINE_SECONDS: float = 60.0
+    MIN_STAGE_SECONDS: float = 2.0
+    OPTIONAL_STAGE_SECONDS: float = 10.0
+    MAX_TOOL_ROUNDS: int = 5
+    
     # Supported languages
     supported_languages: List[str] = ["German", "English", "French", "Dutch", "Spanish"]
     
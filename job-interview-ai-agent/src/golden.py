@@ -0,0 +1,213 @@
+"""
+Golden-set regression runner for the Job Interview AI Agent.
+
+Runs a set of questions with expectations concurrently through InterviewAgent.chat
+and reports answer quality, per-stage latency and token usage, compared to a stored baseline.
+
+Usage:
+    python -m src.golden golden/default.yaml [--stub] [--concurrency 4]
+                         [--baseline golden/baseline.json] [--save-baseline]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .budget import TokenBudget
+from .interview import InterviewAgent
+from .llm_service import LLMService
+from .stub_llm import create_stub_llm_service
+from .turn import Turn
+from .utils import percentile
+
+class GoldenCase(BaseModel):
+    """A single question of the golden set with its expectations."""
+    question: str
+    history: List[Dict[str, str]] = []
+    language: Optional[str] = None
+    must_mention: List[str] = []
+    must_not_mention: List[str] = []
+    stub_reply: Optional[str] = None
+
+class GoldenResult(BaseModel):
+    """Outcome of running a single golden case."""
+    question: str
+    reply: str = ""
+    problems: List[str] = []
+    accepted: Optional[bool] = None
+    perfection: Optional[int] = None
+    seconds: float = 0.0
+    stages: Dict[str, float] = {}
+    tokens: Dict[str, int] = {}
+
+def load_golden_set(path: str) -> List[GoldenCase]:
+    """Load golden cases from a YAML or JSON file, either a list or a dict with a 'questions' list."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            import yaml # only needed for YAML golden sets
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("questions", [])
+    return [GoldenCase.model_validate(case) for case in data]
+
+def check_expectations(case: GoldenCase, reply: str, turn: Turn) -> List[str]:
+    """Return a list of human-readable problems, empty if all expectations are met."""
+    problems = []
+    if case.language and (not turn.metadata or turn.metadata.language != case.language):
+        detected = turn.metadata.language if turn.metadata else None
+        problems.append(f"language: expected {case.language}, detected {detected}")
+    lower_reply = reply.lower()
+    for fact in case.must_mention:
+        if fact.lower() not in lower_reply:
+            problems.append(f"missing: {fact}")
+    for hint in case.must_not_mention:
+        if hint.lower() in lower_reply:
+            problems.append(f"must not mention: {hint}")
+    return problems
+
+async def run_case(agent: InterviewAgent, case: GoldenCase, semaphore: asyncio.Semaphore) -> GoldenResult:
+    """Run a single golden case through the chat pipeline."""
+    async with semaphore:
+        turn = Turn(agent.persona, session_id=f"golden:{case.question}")
+        started = time.perf_counter()
+        try:
+            reply = await asyncio.to_thread(agent.chat, case.question, case.history, turn)
+        except Exception as e:
+            return GoldenResult(question=case.question, problems=[f"error: {e!r}"],
+                                seconds=time.perf_counter() - started)
+        result = GoldenResult(
+            question=case.question,
+            reply=reply,
+            problems=check_expectations(case, reply, turn),
+            accepted=turn.evaluation.is_acceptable if turn.evaluation else None,
+            perfection=turn.evaluation.perfection if turn.evaluation else None,
+            seconds=time.perf_counter() - started
+        )
+        for stage in turn.stages:
+            result.stages[stage.stage] = result.stages.get(stage.stage, 0.0) + stage.seconds
+            result.tokens[stage.stage] = result.tokens.get(stage.stage, 0) + stage.prompt_tokens + stage.completion_tokens
+        return result
+
+def summarize(results: List[GoldenResult]) -> dict:
+    """Aggregate the results into a JSON-serializable report."""
+    evaluated = [r for r in results if r.accepted is not None]
+    perfections = [r.perfection for r in results if r.perfection is not None]
+    histogram = {"0-49": 0, "50-69": 0, "70-89": 0, "90-100": 0}
+    for p in perfections:
+        bucket = "0-49" if p < 50 else "50-69" if p < 70 else "70-89" if p < 90 else "90-100"
+        histogram[bucket] += 1
+
+    latencies: Dict[str, List[float]] = {"total": [r.seconds for r in results]}
+    tokens: Dict[str, int] = {}
+    for r in results:
+        for stage, seconds in r.stages.items():
+            latencies.setdefault(stage, []).append(seconds)
+        for stage, count in r.tokens.items():
+            tokens[stage] = tokens.get(stage, 0) + count
+
+    return {
+        "cases": len(results),
+        "pass_rate": sum(1 for r in results if not r.problems) / len(results) if results else 0.0,
+        "acceptance_rate": sum(1 for r in evaluated if r.accepted) / len(evaluated) if evaluated else 0.0,
+        "perfection": {
+            "mean": statistics.mean(perfections) if perfections else 0.0,
+            "min": min(perfections) if perfections else 0,
+            "histogram": histogram
+        },
+        "latency": {
+            stage: {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "max": max(values)}
+            for stage, values in latencies.items() if values
+        },
+        "tokens": tokens,
+        "total_tokens": sum(tokens.values()),
+        "failures": [{"question": r.question, "problems": r.problems} for r in results if r.problems]
+    }
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Print the differences to the baseline and return the list of regressions."""
+    regressions = []
+
+    def compare(label: str, current: float, previous: float, higher_is_better: bool):
+        delta = current - previous
+        print(f"  {label:<30} {previous:>10.3f} -> {current:>10.3f} ({delta:+.3f})")
+        worse = -delta if higher_is_better else delta
+        if worse > abs(previous) * tolerance and worse > 1e-9:
+            regressions.append(label)
+
+    print("Compared to baseline:")
+    compare("pass_rate", report["pass_rate"], baseline.get("pass_rate", 0.0), True)
+    compare("acceptance_rate", report["acceptance_rate"], baseline.get("acceptance_rate", 0.0), True)
+    compare("perfection.mean", report["perfection"]["mean"], baseline.get("perfection", {}).get("mean", 0.0), True)
+    for stage, latency in report["latency"].items():
+        previous = baseline.get("latency", {}).get(stage)
+        if previous:
+            compare(f"latency.{stage}.p95", latency["p95"], previous["p95"], False)
+    compare("total_tokens", report["total_tokens"], baseline.get("total_tokens", 0), False)
+    return regressions
+
+def print_report(report: dict) -> None:
+    """Print a human-readable summary of the report."""
+    print(f"cases: {report['cases']}, pass rate: {report['pass_rate']:.0%}, "
+          f"acceptance rate: {report['acceptance_rate']:.0%}")
+    print(f"perfection: mean {report['perfection']['mean']:.1f}, min {report['perfection']['min']}, "
+          f"histogram {report['perfection']['histogram']}")
+    for stage, latency in report["latency"].items():
+        print(f"latency {stage:<12} p50 {latency['p50']:.2f}s  p95 {latency['p95']:.2f}s  max {latency['max']:.2f}s"
+              f"  tokens {report['tokens'].get(stage, '')}")
+    for failure in report["failures"]:
+        print(f"FAILED: {failure['question']}: {'; '.join(failure['problems'])}")
+
+async def run_golden_set(agent: InterviewAgent, cases: List[GoldenCase], concurrency: int) -> dict:
+    """Run all cases with at most `concurrency` chats in parallel and return the report."""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(run_case(agent, case, semaphore) for case in cases))
+    return summarize(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-set regression runner for the interview agent")
+    parser.add_argument("golden_set", help="YAML or JSON file with questions and expectations")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum number of parallel chats")
+    parser.add_argument("--stub", action="store_true", help="use a local stub instead of the real LLM endpoints")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="simulated latency per stub request")
+    parser.add_argument("--baseline", default="golden/baseline.json", help="baseline report to compare to")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative tolerance before a change is a regression")
+    args = parser.parse_args()
+
+    cases = load_golden_set(args.golden_set)
+    if args.stub:
+        replies = {c.question: c.stub_reply for c in cases if c.stub_reply}
+        languages = {c.question: c.language for c in cases if c.language}
+        llm_service = create_stub_llm_service(args.stub_latency, replies, languages)
+    else:
+        llm_service = LLMService()
+    # golden runs must not be affected by (or count against) the token budgets of the live service
+    agent = InterviewAgent(llm_service, persona="golden", budget=TokenBudget(0, 0, 0, 0))
+
+    report = asyncio.run(run_golden_set(agent, cases, args.concurrency))
+    print_report(report)
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved: {args.baseline}")
+
+    if regressions:
+        print(f"REGRESSIONS: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -4,26 +4,45 @@ Main module for the Job Interview AI Agent.
 import os
 from datetime import date
 import gradio as gr
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional
 
 from .config import settings
 from .utils import human_readable_list, read_markdown_file
 from .models import QuestionMetadata
 from .llm_service import LLMService
+from .turn import Turn, DeadlineExceeded
+from .budget import TokenBudget, token_budget, ECONOMY, EXHAUSTED
 
 class InterviewAgent:
     """Main class for the Job Interview AI Agent."""
     
-    def __init__(self):
-        """Initialize the Interview Agent."""
-        self.llm_service = LLMService()
+    def __init__(self, llm_service: Optional[LLMService] = None, name: Optional[str] = None,
+                 local_data: Optional[str] = None, persona: str = "default",
+                 budget: Optional[TokenBudget] = None, default_data: str = "data"):
+        """
+        Initialize the Interview Agent.
+
+        Args:
+            llm_service: LLM service to use, can be shared between several agents
+            name: name of the represented person, defaults to NAME from the environment
+            local_data: directory with local background data, defaults to LOCAL_DATA
+            persona: label of this persona used in log output
+            budget: token budget to account the turns to, defaults to the global budget
+            default_data: directory with the background data used where local_data has no file,
+                the bundled "data" of a single persona deployment or the neutral "data-default"
+        """
+        self.llm_service = llm_service if llm_service else LLMService()
+        self.budget = budget if budget else token_budget
+        self.persona = persona
+        self.local_data = local_data if local_data is not None else settings.LOCAL_DATA
+        self.default_data = default_data
         self.known_languages = settings.supported_languages
         self.known_languages_str = human_readable_list(self.known_languages)
         self.known_languages_quoted = human_readable_list(self.known_languages, quote='"')
         
         # Load profile data
         self.background_data = self._load_background_data()
-        self.name = os.getenv("NAME")
+        self.name = name if name else os.getenv("NAME")
         
         # Initialize prompts
         self.system_prompt = self._create_system_prompt()
@@ -34,12 +53,12 @@ class InterviewAgent:
         keys = { "general", "profile", "career", "knowledge", "personal", "health", "political", "hobbies", "other" }
         
         data = {}
-        local_data_path = os.path.expanduser(settings.LOCAL_DATA) if settings.LOCAL_DATA else None
-        print(f"local_data_path: {local_data_path}")
+        local_data_path = os.path.expanduser(self.local_data) if self.local_data else None
+        print(f"[{self.persona}] local_data_path: {local_data_path}")
         
         # First try to discover available keys from files
         available_keys = set()
-        for directory in ["data", local_data_path] if local_data_path else ["data"]:
+        for directory in [self.default_data, local_data_path] if local_data_path else [self.default_data]:
             if os.path.exists(directory):
                 for filename in os.listdir(directory):
                     if filename.endswith('.md'):
@@ -52,7 +71,7 @@ class InterviewAgent:
         # Load content for each valid key
         for key in valid_keys:
             filename = f"{key}.md"
-            default_path = os.path.join("data", filename)
+            default_path = os.path.join(self.default_data, filename)
             local_path = os.path.join(local_data_path, filename) if local_data_path else None            
             path_to_use = local_path if local_path and os.path.exists(local_path) else default_path
             content = read_markdown_file(path_to_use)
@@ -149,32 +168,67 @@ class InterviewAgent:
         {background_info}
         """
     
-    def chat(self, message: str, history: List[Tuple[str, str]]) -> str:
-        """Process a chat message and return the response."""
-        # Convert history to the format expected by the LLM service
-        formatted_history = [
-            {"role": "user" if i % 2 == 0 else "assistant", "content": msg}
-            for h in history for i, msg in enumerate(h)
-        ]
+    def chat(self, message: str, history: List, turn: Optional[Turn] = None) -> str:
+        """
+        Process a chat message and return the response.
+
+        Args:
+            message: the latest message of the user
+            history: previous messages, either as (user, assistant) pairs or as role/content dicts
+            turn: collects metadata, evaluation and per-stage statistics of this turn if given
+        """
+        turn = turn if turn else Turn(self.persona)
+        formatted_history = self._format_history(history)
+        
+        # Downgrade models or refuse to answer, depending on the token budget
+        level = self.budget.level(turn.session_id)
+        if level == EXHAUSTED:
+            print(f"[{self.persona}] token budget exhausted for session {turn.session_id}")
+            return self._get_budget_exhausted_response()
+        if level == ECONOMY:
+            print(f"[{self.persona}] token budget economy level for session {turn.session_id}")
+            turn.generator = settings.answer_generator_economy
+            turn.skip_evaluation = settings.ECONOMY_SKIPS_EVALUATION
         
+        try:
+            return self._answer(message, formatted_history, turn)
+        except DeadlineExceeded as e:
+            print(f"[{self.persona}] deadline exceeded: {e}")
+            return self._get_timeout_response(turn)
+        finally:
+            self.budget.charge(turn.session_id, turn.total_tokens)
+    
+    def _answer(self, message: str, formatted_history: List[Dict[str, str]], turn: Turn) -> str:
+        """Run the chat pipeline: metadata, generation, evaluation and, if needed, regeneration."""
         # Analyze question metadata
-        metadata: QuestionMetadata = self.llm_service.determine_question_metadata(message, self.system_prompt)
+        metadata: QuestionMetadata = self.llm_service.determine_question_metadata(message, self.system_prompt, turn)
+        turn.metadata = metadata
         
         # Check language support
         if metadata.language not in self.known_languages:
             return f"I'm sorry, I can only answer questions in {self.known_languages_str}."
         
         # Generate initial response
-        reply = self.llm_service.generate_answer(message, formatted_history, self.system_prompt)
-        
-        # Evaluate response
-        evaluation = self.llm_service.evaluate_response(reply, message, formatted_history, self.evaluator_prompt)
+        reply = self.llm_service.generate_answer(message, formatted_history, self.system_prompt, turn)
+        if turn.skip_evaluation:
+            return reply
         
-        # If evaluation fails, try to generate a better response
-        if not evaluation.is_acceptable:
-            print("answer rejected, another try")
-            updated_prompt = self.system_prompt + f"\n\n## Previous answer rejected\n{evaluation.feedback}\n"
-            reply = self.llm_service.generate_answer(message, formatted_history, updated_prompt)
+        # Evaluate and regenerate are optional stages, skipped if the deadline is near
+        try:
+            if not turn.deadline.allows(settings.OPTIONAL_STAGE_SECONDS):
+                raise DeadlineExceeded("evaluate: skipped")
+            evaluation = self.llm_service.evaluate_response(reply, message, formatted_history, self.evaluator_prompt, turn)
+            turn.evaluation = evaluation
+            
+            # If evaluation fails, try to generate a better response
+            if not evaluation.is_acceptable:
+                if not turn.deadline.allows(settings.OPTIONAL_STAGE_SECONDS):
+                    raise DeadlineExceeded("regenerate: skipped")
+                print(f"[{self.persona}] answer rejected, another try")
+                updated_prompt = self.system_prompt + f"\n\n## Previous answer rejected\n{evaluation.feedback}\n"
+                reply = self.llm_service.generate_answer(message, formatted_history, updated_prompt, turn, stage="regenerate")
+        except DeadlineExceeded as e:
+            print(f"[{self.persona}] {e}, {turn.deadline.remaining():.1f}s left, returning the unevaluated answer")
         
         # Handle questions with too little background information
         # FIXME: reactivate
@@ -183,6 +237,20 @@ class InterviewAgent:
         
         return reply
     
+    @staticmethod
+    def _format_history(history: List) -> List[Dict[str, str]]:
+        """Convert the history to the role/content format expected by the LLM service."""
+        formatted = []
+        for entry in history:
+            if isinstance(entry, dict):
+                formatted.append({"role": entry["role"], "content": entry["content"]})
+            else:
+                formatted.extend(
+                    {"role": "user" if i % 2 == 0 else "assistant", "content": msg}
+                    for i, msg in enumerate(entry) if msg
+                )
+        return formatted
+    
     def _get_unknown_response(self, language: str) -> str:
         """Get response for unsufficient background data in the appropriate language."""
         responses = {
@@ -194,6 +262,27 @@ class InterviewAgent:
         }
         return responses.get(language, responses["English"])
 
+    def _get_timeout_response(self, turn: Turn) -> str:
+        """Get response for a turn which could not be answered before its deadline."""
+        responses = {
+            "German": "Entschuldigung, das hat zu lange gedauert. Bitte versuchen Sie es noch einmal.",
+            "English": "Sorry, this took too long. Please try again.",
+            "French": "Désolé, cela a pris trop de temps. Veuillez réessayer.",
+            "Spanish": "Lo siento, esto ha tardado demasiado. Por favor, inténtelo de nuevo.",
+            "Dutch": "Sorry, dit duurde te lang. Probeer het alstublieft opnieuw."
+        }
+        language = turn.metadata.language if turn.metadata else "English"
+        return responses.get(language, responses["English"])
+
+    def _get_budget_exhausted_response(self) -> str:
+        """Get response for an exhausted token budget, the language of the question is unknown at this point."""
+        return (
+            "Thank you for your interest! This chatbot has reached its usage limit for now, "
+            f"please try again later or get in touch with {self.name} directly.\n\n"
+            "Vielen Dank für Ihr Interesse! Dieser Chatbot hat sein Nutzungslimit vorerst erreicht, "
+            f"bitte versuchen Sie es später noch einmal oder kontaktieren Sie {self.name} direkt."
+        )
+
 def consent(agreed):
     """Handle consent state changes."""
     return (
@@ -201,9 +290,9 @@ def consent(agreed):
         gr.update(visible=agreed)       # chat_group
     )
 
-def create_gradio_interface() -> gr.Interface:
-    """Create and configure the Gradio interface."""
-    agent = InterviewAgent()
+def create_gradio_interface(agent: Optional[InterviewAgent] = None) -> gr.Interface:
+    """Create and configure the Gradio interface for the given (or a new default) agent."""
+    agent = agent if agent else InterviewAgent()
     title = f"{agent.name}'s Virtual Job Interview Chatbot"
 
     with gr.Blocks(title=title, analytics_enabled=False) as interface:
@@ -251,8 +340,12 @@ def create_gradio_interface() -> gr.Interface:
                 value=[{"role": "assistant", "content": f"Hello, I am {agent.name}. How can I help you today?"}],
                 type="messages"
             )
+            def respond(message, history, request: gr.Request):
+                session_id = request.session_hash if request else None
+                return agent.chat(message, history, Turn(agent.persona, session_id))
+
             gr.ChatInterface(
-                fn=agent.chat,
+                fn=respond,
                 chatbot=chatbot,
                 type="messages",
                 analytics_enabled=False
@@ -1,79 +1,137 @@
 """
 Language Model Service for the Job Interview AI Agent.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 import json
-from openai import OpenAI
-from .config import settings
+import time
+from openai import OpenAI, APITimeoutError
+from .config import settings, LLMConfig
 from .models import Evaluation, QuestionMetadata, ChatMessage
-from .mcp_tools import handle_mcp_tool_calls, mcp_tools
+from .turn import Turn, DeadlineExceeded
+
+def create_openai_client(config: LLMConfig) -> OpenAI:
+    """Create an OpenAI compatible client for the given LLM configuration."""
+    return OpenAI(
+        api_key=config.api_key,
+        base_url=config.base_url
+    )
 
 class LLMService:
     """Service for interacting with Language Models."""
     
-    def __init__(self):
-        """Initialize LLM clients."""
-        self.answer_generator = OpenAI(
-            api_key=settings.answer_generator.api_key
-        )
-        
-        self.answer_evaluator = OpenAI(
-            api_key=settings.answer_evaluator.api_key,
-            base_url=settings.answer_evaluator.base_url
-        )
+    def __init__(self, client_factory: Callable[[LLMConfig], Any] = create_openai_client,
+                 tools: Optional[List[Dict[str, Any]]] = None,
+                 handle_tool_calls: Optional[Callable[[Any], List[Dict[str, Any]]]] = None):
+        """
+        Initialize LLM clients.
+
+        Args:
+            client_factory: creates a client for an LLM configuration, e.g. a local stub for testing
+            tools: tools offered to the answer generator, by default the MCP tools of src/mcp_tools.py
+            handle_tool_calls: executes the tool calls of the answer generator and returns the tool messages
+        """
+        if tools is None:
+            # the MCP tools are deployed separately, so they are only imported when actually used
+            from .mcp_tools import handle_mcp_tool_calls, mcp_tools
+            tools, handle_tool_calls = mcp_tools, handle_mcp_tool_calls
+        self.tools = tools
+        self.handle_tool_calls = handle_tool_calls
+        self.client_factory = client_factory
+        self._clients: Dict[tuple, Any] = {}
+        self.answer_generator = self.client_for(settings.answer_generator)
+        self.answer_evaluator = self.client_for(settings.answer_evaluator)
+    
+    def client_for(self, config: LLMConfig) -> Any:
+        """Get the (shared) client for the given LLM configuration."""
+        key = (config.api_key, config.base_url)
+        if key not in self._clients:
+            self._clients[key] = self.client_factory(config)
+        return self._clients[key]
+    
+    def _client(self, config: LLMConfig, turn: Optional[Turn], stage: str, share: float = 1.0) -> Any:
+        """Get the client for a stage, with a timeout derived from the remaining time of the turn."""
+        client = self.client_for(config)
+        if turn:
+            # no retries: a retry would not fit into the timeout anyway
+            client = client.with_options(timeout=turn.deadline.timeout(stage, share), max_retries=0)
+        return client
     
-    def determine_question_metadata(self, question: str, system_prompt: str) -> QuestionMetadata:
+    def determine_question_metadata(self, question: str, system_prompt: str, turn: Optional[Turn] = None) -> QuestionMetadata:
         """Analyze question metadata using the answer generator."""
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": question},
             {"role": "user", "content": self._get_metadata_prompt()},
         ]
-        response = self.answer_generator.chat.completions.create(
-            model=settings.answer_generator.model_name,
-            messages=messages
-        )
+        generator = turn.generator if turn else settings.answer_generator
+        started = time.perf_counter()
+        try:
+            # leave most of the remaining time for the generation of the answer
+            response = self._client(generator, turn, "metadata", share=0.3).chat.completions.create(
+                model=generator.model_name,
+                messages=messages
+            )
+        except APITimeoutError as e:
+            raise DeadlineExceeded("metadata: timed out") from e
+        if turn:
+            turn.record("metadata", started, response)
         content = response.choices[0].message.content
         print(f"metadata: {content}")
         return QuestionMetadata.model_validate_json(content)
     
-    def generate_answer(self, message: str, history: List[Dict[str, str]], system_prompt: str) -> str:
+    def generate_answer(self, message: str, history: List[Dict[str, str]], system_prompt: str,
+                        turn: Optional[Turn] = None, stage: str = "generate") -> str:
         """Generate an answer using the answer generator."""
         messages = [{"role": "system", "content": system_prompt}] + history + [{"role": "user", "content": message}]
 
-        while True:
-            response = self.answer_generator.chat.completions.create(
-                model=settings.answer_generator.model_name,
-                messages=messages,
-                tools = mcp_tools,
-                tool_choice = "auto"
-            )
+        generator = turn.generator if turn else settings.answer_generator
+        for tool_round in range(settings.MAX_TOOL_ROUNDS + 1):
+            started = time.perf_counter()
+            try:
+                response = self._client(generator, turn, stage).chat.completions.create(
+                    model=generator.model_name,
+                    messages=messages,
+                    tools = self.tools,
+                    # in the last round, an answer is enforced to end any tool-call ping-pong
+                    tool_choice = "auto" if tool_round < settings.MAX_TOOL_ROUNDS else "none"
+                )
+            except APITimeoutError as e:
+                raise DeadlineExceeded(f"{stage}: timed out in round {tool_round}") from e
+            if turn:
+                turn.record(stage, started, response)
 
             finish_reason = response.choices[0].finish_reason
             print(f"finish reason({message}): ", finish_reason)
             if finish_reason == "tool_calls":
-                message = response.choices[0].message
-                tool_calls = message.tool_calls
-                results = handle_mcp_tool_calls(tool_calls)
-                messages.append(message)
+                assistant_message = response.choices[0].message
+                results = self.handle_tool_calls(assistant_message.tool_calls)
+                messages.append(assistant_message)
                 messages.extend(results)
             else:
                 break
 
         return response.choices[0].message.content
     
-    def evaluate_response(self, reply: str, message: str, history: List[Dict[str, str]], evaluator_prompt: str) -> Evaluation:
+    def evaluate_response(self, reply: str, message: str, history: List[Dict[str, str]], evaluator_prompt: str,
+                          turn: Optional[Turn] = None) -> Evaluation:
         """Evaluate a response using the answer evaluator."""
         messages = [
             {"role": "system", "content": evaluator_prompt},
             {"role": "user", "content": self._get_evaluation_prompt(reply, message, history)}
         ]
         
-        response = self.answer_evaluator.beta.chat.completions.parse(
-            model=settings.answer_evaluator.model_name,
-            messages=messages,
-            response_format=Evaluation
-        )
+        evaluator = turn.evaluator if turn else settings.answer_evaluator
+        started = time.perf_counter()
+        try:
+            response = self._client(evaluator, turn, "evaluate").beta.chat.completions.parse(
+                model=evaluator.model_name,
+                messages=messages,
+                response_format=Evaluation
+            )
+        except APITimeoutError as e:
+            raise DeadlineExceeded("evaluate: timed out") from e
+        if turn:
+            turn.record("evaluate", started, response)
         parsed = response.choices[0].message.parsed
         print(f"evaluation: {parsed}")
         return parsed
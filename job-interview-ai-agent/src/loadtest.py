@@ -0,0 +1,211 @@
+"""
+Local load test for the chat API and the Gradio UI of the Job Interview AI Agent.
+
+Sends chat requests from concurrent clients, each continuing its own session, and reports
+throughput, latency, CPU time and, for streams, the time to the first event and the first reply token.
+By default the complete app (API and Gradio UI) is started in this process with stub LLM clients,
+so the numbers show the overhead of the web stack and the pipeline without any LLM latency or cost.
+
+Usage:
+    python -m src.loadtest [--requests 200] [--concurrency 10] [--stream | --gradio | --compare] [--stub-latency 0.0]
+    python -m src.loadtest --url http://127.0.0.1:7860 [--persona michael]   # against a running server
+"""
+import argparse
+import http.client
+import json
+import resource
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from urllib.parse import urlsplit
+
+from .utils import percentile
+
+QUESTIONS = [
+    "What is your experience with Java?",
+    "Which frameworks have you been working with?",
+    "Are you available for a new project?",
+    "Was machst du in deiner Freizeit?",
+]
+
+# the load test targets: JSON API, its Server-Sent Events stream and the Gradio UI
+API, STREAM, GRADIO = "api", "stream", "gradio"
+
+class Result:
+    """Outcome of a single chat request."""
+
+    def __init__(self):
+        self.ok = False
+        self.error: Optional[str] = None
+        self.seconds = 0.0
+        self.first_event: Optional[float] = None
+        self.first_token: Optional[float] = None
+        self.session_id: Optional[str] = None
+
+def start_stub_server(stub_latency: float) -> str:
+    """Start the app with stub LLM clients in a background thread and return its base URL."""
+    import uvicorn
+    from .budget import TokenBudget
+    from .main import create_app
+    from .stub_llm import create_stub_llm_service
+
+    # load tests must not be affected by (or count against) the token budgets
+    app = create_app(create_stub_llm_service(stub_latency), TokenBudget(0, 0, 0, 0))
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+def chat_request(url: str, path: str, message: str, session_id: Optional[str], stream: bool) -> Result:
+    """Send a single chat request to the API and time it."""
+    result = Result()
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+    started = time.perf_counter()
+    try:
+        body = json.dumps({"message": message, "session_id": session_id})
+        connection.request("POST", parts.path.rstrip("/") + path + ("/stream" if stream else ""), body,
+                           {"Content-Type": "application/json"})
+        response = connection.getresponse()
+        if response.status != 200:
+            result.error = f"HTTP {response.status}"
+            return result
+        if not stream:
+            data = json.loads(response.read())
+            result.ok = bool(data.get("reply"))
+            result.session_id = data.get("session_id")
+            return result
+        event = None
+        for line in response:
+            line = line.decode("utf-8").rstrip("\r\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+                if result.first_event is None:
+                    result.first_event = time.perf_counter() - started
+                if event == "token" and result.first_token is None:
+                    result.first_token = time.perf_counter() - started
+                elif event == "error":
+                    result.error = "error event"
+            elif line.startswith("data: ") and event == "done":
+                data = json.loads(line[len("data: "):])
+                result.ok = bool(data.get("reply"))
+                result.session_id = data.get("session_id")
+        if not result.ok and not result.error:
+            result.error = "stream ended without reply"
+    except Exception as e:
+        result.error = repr(e)
+    finally:
+        result.seconds = time.perf_counter() - started
+        connection.close()
+    return result
+
+def api_client(url: str, persona: str, stream: bool) -> Callable[[str], Result]:
+    """A client of the API, continuing the session issued with its first reply."""
+    path = f"/api/{persona}/chat" if persona else "/api/chat"
+    session_id = None
+
+    def send(message: str) -> Result:
+        nonlocal session_id
+        result = chat_request(url, path, message, session_id, stream)
+        session_id = result.session_id or session_id
+        return result
+    return send
+
+def gradio_client(url: str, persona: str) -> Callable[[str], Result]:
+    """A client of the Gradio UI, using its queue like the browser does."""
+    from gradio_client import Client # comes with gradio, only needed for this target
+    client = Client(f"{url}/{persona}/" if persona else f"{url}/", verbose=False)
+
+    def send(message: str) -> Result:
+        result = Result()
+        started = time.perf_counter()
+        try:
+            result.ok = bool(client.predict(message, api_name="/chat"))
+        except Exception as e:
+            result.error = repr(e)
+        result.seconds = time.perf_counter() - started
+        return result
+    return send
+
+def run_load(url: str, persona: str, target: str, requests: int, concurrency: int) -> dict:
+    """Send the requests from concurrent clients and return the results with the time and CPU time taken."""
+    per_client = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+
+    def run_client(count: int) -> List[Result]:
+        # connecting is not part of the measurement, it is done once per client
+        send = gradio_client(url, persona) if target == GRADIO else api_client(url, persona, target == STREAM)
+        return [send(QUESTIONS[n % len(QUESTIONS)]) for n in range(count)]
+
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = [r for rs in executor.map(run_client, per_client) for r in rs]
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "target": target,
+        "results": results,
+        "seconds": time.perf_counter() - started,
+        "cpu": (usage_after.ru_utime + usage_after.ru_stime) - (usage_before.ru_utime + usage_before.ru_stime),
+    }
+
+def print_latency(label: str, values: List[float]) -> None:
+    if values:
+        print(f"{label:<14} p50 {percentile(values, 0.5) * 1000:8.1f}ms  p95 {percentile(values, 0.95) * 1000:8.1f}ms"
+              f"  max {max(values) * 1000:8.1f}ms")
+
+def print_run(run: dict, concurrency: int, local: bool) -> List[str]:
+    """Print the summary of a run and return its errors."""
+    results = run["results"]
+    errors = [r.error for r in results if not r.ok]
+    print(f"{run['target']}: {len(results)} requests, {concurrency} clients, "
+          f"{len(errors)} errors, {len(results) / run['seconds']:.1f} requests/s")
+    print_latency("latency", [r.seconds for r in results if r.ok])
+    print_latency("first event", [r.first_event for r in results if r.first_event is not None])
+    print_latency("first token", [r.first_token for r in results if r.first_token is not None])
+    if local:
+        # server and clients share this process, so this is an upper bound for the server
+        print(f"cpu            {run['cpu'] / len(results) * 1000:8.2f}ms per request (server and clients)")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the chat API and the Gradio UI of the interview agent")
+    parser.add_argument("--url", help="base URL of a running server, by default one with stub LLMs is started")
+    parser.add_argument("--persona", default="", help="path of the persona to chat with")
+    parser.add_argument("--requests", type=int, default=200, help="total number of chat requests")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of concurrent clients")
+    targets = parser.add_mutually_exclusive_group()
+    targets.add_argument("--stream", action="store_true", help="use the Server-Sent Events endpoint of the API")
+    targets.add_argument("--gradio", action="store_true", help="use the Gradio UI instead of the API")
+    targets.add_argument("--compare", action="store_true", help="run the API and then the Gradio UI")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="simulated latency per stub LLM request")
+    args = parser.parse_args()
+
+    url = (args.url or start_stub_server(args.stub_latency)).rstrip("/")
+    persona = args.persona.strip("/")
+    targets = [API, GRADIO] if args.compare else [STREAM if args.stream else GRADIO if args.gradio else API]
+    print(f"{url}, persona '{persona or 'default'}'")
+
+    runs, errors = [], []
+    for target in targets:
+        runs.append(run_load(url, persona, target, args.requests, args.concurrency))
+        errors += print_run(runs[-1], args.concurrency, not args.url)
+    if len(runs) == 2:
+        api, gradio = runs
+        print(f"API compared to Gradio: {gradio['seconds'] / api['seconds']:.1f}x throughput"
+              + (f", {gradio['cpu'] / api['cpu']:.1f}x less cpu per request" if not args.url and api["cpu"] else ""))
+    if not args.url:
+        print(f"peak memory    {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    for error in sorted(set(errors))[:10]:
+        print(f"ERROR: {error}")
+    if errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,59 @@
 """
 Main entry point for the Job Interview AI Agent.
 """
-from .interview import create_gradio_interface
-from .config import settings
+from typing import Optional
+
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI
+
+from .api import create_api_router
+from .budget import TokenBudget
+from .interview import InterviewAgent, create_gradio_interface
+from .llm_service import LLMService
+from .config import settings, PersonaConfig
+
+def create_app(llm_service: Optional[LLMService] = None, budget: Optional[TokenBudget] = None) -> FastAPI:
+    """
+    Create a single web app serving all configured personas.
+
+    Every persona gets its own agent (prompts, background data, log label),
+    but all of them share one LLM service and thus the same LLM clients.
+    Each agent is served by the Gradio UI and by the JSON/SSE API under /api.
+
+    Args:
+        llm_service: LLM service to use, e.g. with stub clients for load tests
+        budget: token budget to account the turns to, defaults to the global budget
+    """
+    llm_service = llm_service if llm_service else LLMService()
+    personas = settings.PERSONAS or {
+        "": PersonaConfig(name=settings.NAME, local_data=settings.LOCAL_DATA)
+    }
+
+    # configured personas must never see the bundled data of the single persona deployment in data/
+    default_data = "data-default" if settings.PERSONAS else "data"
+    agents = {
+        path.strip("/"): InterviewAgent(llm_service, persona.name, persona.local_data,
+                                        persona=path or "default", budget=budget, default_data=default_data)
+        for path, persona in personas.items()
+    }
+
+    app = FastAPI()
+    # the API routes must be registered before the Gradio apps, a mount at "/" would catch them otherwise
+    app.include_router(create_api_router(agents))
+    for path, agent in agents.items():
+        mount_path = f"/{path}" if path else "/"
+        print(f"serving persona '{agent.name}' at {mount_path} and /api{mount_path.rstrip('/')}/chat")
+        app = gr.mount_gradio_app(app, create_gradio_interface(agent), path=mount_path)
+    return app
 
 def main():
     """Main entry point for the application."""
-    create_gradio_interface().launch(
-        server_name="127.0.0.1",
-        server_port=settings.GRADIO_PORT,
-        share=False
+    uvicorn.run(
+        create_app(),
+        host="127.0.0.1",
+        port=settings.GRADIO_PORT
     )
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,8 +1,12 @@
 """
 Data models for the Job Interview AI Agent.
 """
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Literal, Optional
+
+# limits of the history a client of the chat API may send
+MAX_HISTORY_MESSAGES = 20
+MAX_HISTORY_CHARS = 20000
 
 class Evaluation(BaseModel):
     """Model for evaluating chat responses."""
@@ -19,10 +23,37 @@ class QuestionMetadata(BaseModel):
     category: str
 
 class ChatMessage(BaseModel):
-    """Model for chat messages."""
-    role: str
-    content: str
+    """Model for chat messages, only the conversation itself, the system prompt is never sent by a client."""
+    role: Literal["user", "assistant"]
+    content: str = Field(max_length=4000)
 
 class ChatHistory(BaseModel):
     """Model for chat history."""
-    messages: List[ChatMessage] 
\ No newline at end of file
+    messages: List[ChatMessage] 
+
+class StageStats(BaseModel):
+    """Model for latency and token usage of a single pipeline stage."""
+    stage: str
+    seconds: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+class ChatRequest(BaseModel):
+    """Model for a request to the chat API."""
+    message: str = Field(min_length=1, max_length=4000)
+    history: Optional[List[ChatMessage]] = Field(default=None, max_length=MAX_HISTORY_MESSAGES)
+    session_id: Optional[str] = Field(default=None, max_length=100)
+
+    @field_validator("history")
+    @classmethod
+    def limit_history_size(cls, history: Optional[List[ChatMessage]]) -> Optional[List[ChatMessage]]:
+        if history and sum(len(m.content) for m in history) > MAX_HISTORY_CHARS:
+            raise ValueError(f"history exceeds {MAX_HISTORY_CHARS} characters")
+        return history
+
+class ChatResponse(BaseModel):
+    """Model for a reply of the chat API."""
+    reply: str
+    session_id: str
+    language: Optional[str] = None
+    stages: List[StageStats] = []
@@ -0,0 +1,100 @@
+"""
+Local stub for the OpenAI compatible clients of the Job Interview AI Agent.
+
+Allows running the complete chat pipeline without calling any real LLM endpoint,
+e.g. for regression and load tests.
+"""
+import json
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from .config import LLMConfig
+from .llm_service import LLMService
+from .models import Evaluation
+
+def _estimate_tokens(text: str) -> int:
+    """Roughly estimate the number of tokens of a text (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+class StubClient:
+    """
+    Deterministic stand-in for an OpenAI client.
+
+    Metadata requests get a JSON answer, generation requests a canned or templated reply
+    and structured evaluation requests an acceptable evaluation.
+    """
+
+    def __init__(self, model_name: str = "stub", latency: float = 0.0,
+                 replies: Optional[Dict[str, str]] = None, languages: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            model_name: model name reported in responses
+            latency: simulated latency per request in seconds
+            replies: canned replies by question, otherwise a templated reply is returned
+            languages: detected language by question, otherwise "English"
+        """
+        self.model_name = model_name
+        self.latency = latency
+        self.replies = replies or {}
+        self.languages = languages or {}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self._parse)))
+
+    def with_options(self, **kwargs) -> "StubClient":
+        """Per-request options like timeouts are ignored by the stub."""
+        return self
+
+    def _create(self, model: str, messages: list, tools=None, **kwargs):
+        question = self._last_question(messages, skip_last=tools is None)
+        if tools is None:
+            content = json.dumps({
+                "question": question,
+                "coverage": 100,
+                "recruiter": 100,
+                "language": self.languages.get(question, "English"),
+                "category": "career"
+            })
+        else:
+            content = self.replies.get(question, f"This is a stub answer to: {question}")
+        return self._response(messages, SimpleNamespace(content=content, tool_calls=None, parsed=None))
+
+    def _parse(self, model: str, messages: list, response_format=Evaluation, **kwargs):
+        parsed = response_format(is_acceptable=True, perfection=100, feedback="stub evaluation")
+        return self._response(messages, SimpleNamespace(content=parsed.model_dump_json(), tool_calls=None, parsed=parsed))
+
+    def _response(self, messages: list, message: SimpleNamespace) -> SimpleNamespace:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        prompt_tokens = sum(_estimate_tokens(str(m.get("content", ""))) for m in messages if isinstance(m, dict))
+        return SimpleNamespace(
+            model=self.model_name,
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=_estimate_tokens(message.content),
+                total_tokens=prompt_tokens + _estimate_tokens(message.content)
+            )
+        )
+
+    @staticmethod
+    def _last_question(messages: list, skip_last: bool) -> str:
+        user_messages = [m["content"] for m in messages if isinstance(m, dict) and m.get("role") == "user"]
+        if skip_last:
+            user_messages = user_messages[:-1]
+        return user_messages[-1] if user_messages else ""
+
+def stub_client_factory(latency: float = 0.0, replies: Optional[Dict[str, str]] = None,
+                        languages: Optional[Dict[str, str]] = None):
+    """Create a client factory for LLMService which returns stub clients."""
+    def factory(config: LLMConfig) -> StubClient:
+        return StubClient(config.model_name, latency, replies, languages)
+    return factory
+
+def create_stub_llm_service(latency: float = 0.0, replies: Optional[Dict[str, str]] = None,
+                            languages: Optional[Dict[str, str]] = None) -> LLMService:
+    """
+    Create an LLMService with stub clients. The stub never calls tools, so no tools are offered
+    and the MCP tools (src/mcp_tools.py) are not needed.
+    """
+    return LLMService(stub_client_factory(latency, replies, languages), tools=[], handle_tool_calls=lambda calls: [])
@@ -0,0 +1,90 @@
+"""
+Per-turn state for the Job Interview AI Agent.
+"""
+import time
+from typing import Callable, List, Optional
+
+from .config import settings, LLMConfig
+from .models import Evaluation, QuestionMetadata, StageStats
+
+class DeadlineExceeded(Exception):
+    """Raised if a stage cannot be finished before the deadline of its turn."""
+
+class Deadline:
+    """Point in time by which a chat turn has to be finished."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Remaining time in seconds, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows(self, seconds: float) -> bool:
+        """Whether there is at least the given time left."""
+        return self.remaining() >= seconds
+
+    def timeout(self, stage: str, share: float = 1.0, minimum: float = settings.MIN_STAGE_SECONDS) -> float:
+        """
+        Derive the timeout for a stage from the remaining time.
+
+        Args:
+            stage: name of the stage, for the error message
+            share: fraction of the remaining time the stage may use, to leave time for later stages
+            minimum: minimum time the stage needs, DeadlineExceeded is raised if less time is left
+        """
+        remaining = self.remaining()
+        if remaining < minimum:
+            raise DeadlineExceeded(f"{stage}: only {remaining:.1f}s of {self.seconds:.0f}s left")
+        return max(minimum, remaining * share)
+
+class Turn:
+    """State of a single chat turn, threaded through all pipeline stages."""
+
+    def __init__(self, persona: str = "default", session_id: Optional[str] = None,
+                 deadline: Optional[Deadline] = None, on_stage: Optional[Callable[[StageStats], None]] = None):
+        """
+        Args:
+            persona: label of the persona, for log output
+            session_id: session the turn belongs to, for the token budget
+            deadline: deadline of the turn, by default CHAT_DEADLINE_SECONDS from now
+            on_stage: called with the statistics of each finished stage, e.g. to report progress
+        """
+        self.persona = persona
+        self.session_id = session_id
+        self.deadline = deadline if deadline else Deadline(settings.CHAT_DEADLINE_SECONDS)
+        self.on_stage = on_stage
+        self.stages: List[StageStats] = []
+        self.metadata: Optional[QuestionMetadata] = None
+        self.evaluation: Optional[Evaluation] = None
+        # models and stages to use, may be downgraded depending on the token budget
+        self.generator: LLMConfig = settings.answer_generator
+        self.evaluator: LLMConfig = settings.answer_evaluator
+        self.skip_evaluation = False
+
+    def record(self, stage: str, started: float, response=None) -> StageStats:
+        """
+        Record a finished stage.
+
+        Args:
+            stage: name of the stage, e.g. "metadata", "generate", "evaluate"
+            started: perf_counter() value taken when the stage started
+            response: the LLM response, its usage is recorded if available
+        """
+        usage = getattr(response, "usage", None)
+        stats = StageStats(
+            stage=stage,
+            seconds=time.perf_counter() - started,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0
+        )
+        self.stages.append(stats)
+        if self.on_stage:
+            self.on_stage(stats)
+        return stats
+
+    @property
+    def total_tokens(self) -> int:
+        """Total number of tokens used in this turn so far."""
+        return sum(s.prompt_tokens + s.completion_tokens for s in self.stages)
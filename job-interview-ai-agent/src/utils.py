@@ -25,4 +25,11 @@ def read_markdown_file(path: str) -> str:
             return f.read()
                 
     print(f"skipping: {path } -- not found")
-    return "" 
\ No newline at end of file
+    return "" 
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of the values, e.g. fraction 0.95 for p95, 0.0 if there are none."""
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
@@ -0,0 +1,4 @@
+"""
+Benchmark suite for timetracker.py: a generator of synthetic logs (benchmark.generate)
+and a throughput and memory benchmark against a stored baseline (benchmark.bench).
+"""
@@ -0,0 +1,132 @@
+"""
+Benchmark for timetracker.py: throughput and peak memory on synthetic logs of 1, 10 and 100 MB,
+compared to a stored baseline, and a check that the output is byte-identical to the baseline's.
+
+Each run processes a generated log (cached in benchmark/data/) in a fresh `python timetracker.py LOG`
+process, so the numbers include everything the command line tool does, and the peak memory (max RSS)
+is that of the process alone.
+
+Usage (from the python-timetracker directory):
+    python -m benchmark [--sizes 1 10 100] [--repeat 3] [--save-baseline] [--tolerance 0.2]
+    python -m benchmark --script path/to/other/timetracker.py   # e.g. to check a changed copy
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from .generate import write_log
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TIMETRACKER = os.path.join(os.path.dirname(HERE), 'timetracker.py')
+DATA_DIR = os.path.join(HERE, 'data')
+BASELINE = os.path.join(HERE, 'baseline.json')
+
+def log_file(size_mb: float, seed: int, data_dir: str = DATA_DIR) -> str:
+    """Returns the path of the generated log of the given size, generating it if it does not exist yet."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"log-{size_mb:g}mb-seed{seed}.md")
+    if not os.path.exists(path):
+        print(f"generating {path} ...", file=sys.stderr)
+        write_log(path + '.tmp', size_mb, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+def count_lines(path: str) -> int:
+    with open(path, 'rb') as f:
+        return sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(1 << 20), b''))
+
+def run_once(script: str, path: str) -> tuple[float, float, str, int]:
+    """Processes the log in a new process, returns (seconds, peak_mb, output_sha256, exit code)."""
+    digest = hashlib.sha256()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, script, path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    for chunk in iter(lambda: process.stdout.read(1 << 20), b''):
+        digest.update(chunk)
+    # wait4 gives the resource usage of just this child, unlike getrusage(RUSAGE_CHILDREN)
+    _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    process.stdout.close()
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return seconds, peak_mb, digest.hexdigest(), process.returncode
+
+def measure(script: str, size_mb: float, seed: int, repeat: int) -> dict:
+    """Best-of-repeat throughput and the largest peak memory for one log size."""
+    path = log_file(size_mb, seed)
+    lines = count_lines(path)
+    runs = [run_once(script, path) for _ in range(repeat)]
+    hashes = {sha for _, _, sha, _ in runs}
+    if len(hashes) > 1:
+        raise RuntimeError(f"non-deterministic output for {path}")
+    best = min(seconds for seconds, _, _, _ in runs)
+    return {
+        'lines': lines,
+        'bytes': os.path.getsize(path),
+        'seconds': round(best, 3),
+        'lines_per_second': round(lines / best),
+        'peak_mb': round(max(peak for _, peak, _, _ in runs), 1),
+        'exit_code': runs[0][3],
+        'output_sha256': runs[0][2],
+    }
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print the differences to the baseline and return the list of regressions."""
+    regressions = []
+    print("Compared to baseline:")
+    for size, result in results.items():
+        previous = baseline.get('results', {}).get(size)
+        if not previous:
+            print(f"  {size:>5} MB: no baseline")
+            continue
+        speed = result['lines_per_second'] / previous['lines_per_second'] - 1
+        memory = result['peak_mb'] - previous['peak_mb']
+        print(f"  {size:>5} MB: {previous['lines_per_second']:>9} -> {result['lines_per_second']:>9} lines/s ({speed:+.1%}),"
+              f" {previous['peak_mb']:>7.1f} -> {result['peak_mb']:>7.1f} MB peak ({memory:+.1f} MB)")
+        if result['output_sha256'] != previous['output_sha256'] or result['exit_code'] != previous['exit_code']:
+            regressions.append(f"{size} MB: output differs from the baseline")
+        if speed < -tolerance:
+            regressions.append(f"{size} MB: throughput {speed:+.1%}")
+        # a few MB of slack, as small processes vary with the interpreter and allocator
+        if memory > previous['peak_mb'] * tolerance + 2:
+            regressions.append(f"{size} MB: peak memory {memory:+.1f} MB")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and memory benchmark for timetracker.py")
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1, 10, 100], help='log sizes in MB')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the generated logs')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per size, the fastest one counts')
+    parser.add_argument('--script', default=TIMETRACKER, help='timetracker.py to benchmark')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline to compare to')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative tolerance before a change is a regression')
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        result = measure(args.script, size, args.seed, args.repeat)
+        results[f"{size:g}"] = result
+        print(f"{size:>7g} MB  {result['lines']:>9} lines  {result['seconds']:>8.2f}s  "
+              f"{result['lines_per_second']:>9} lines/s  {result['peak_mb']:>7.1f} MB peak  exit {result['exit_code']}")
+
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'platform': sys.platform, 'seed': args.seed,
+                       'results': results}, f, indent=2)
+        print(f"baseline saved: {args.baseline}")
+
+    if regressions:
+        print(f"REGRESSIONS: {'; '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Generates realistic synthetic time tracking logs for the benchmark.
+
+The logs contain one dated table per day, with the variations timetracker.py has to handle:
+varying and reordered columns, an existing (possibly stale) Duration column, previously generated
+totals rows, legacy 'Total duration:' lines, code fences with tables inside, tables without a Time column,
+spans crossing midnight and an old '# Task Totals' section. Time periods never overlap,
+so the whole log is processed like a clean one.
+
+Usage:
+    python -m benchmark.generate --size 10 --seed 1 > log.md
+"""
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+
+TASKS = ['dev', 'Meeting', 'review', 'support', 'ops', 'planning', '**urgent**', '']
+NOTES = ['', '', 'refactoring', 'call with customer', 'release 1.2', 'see ticket #4711', 'pairing']
+CLIENTS = ['', 'ACME', 'Initech', 'Globex', 'Umbrella']
+COLUMN_SETS = [
+    ['Time', 'Task', 'Note'],
+    ['Time', 'Task', 'Note', 'Client'],
+    ['Time', 'Task', 'Duration', 'Note'],
+    ['Time', 'Task', 'Client', 'Note', 'Duration'],
+    ['Task', 'Time', 'Note'],
+]
+
+def span(start: int, end: int, padded: bool) -> str:
+    fmt = (lambda m: f"{m // 60 % 24:02d}:{m % 60:02d}") if padded else (lambda m: f"{m // 60 % 24}:{m % 60:02d}")
+    return f"{fmt(start)}-{fmt(end)}"
+
+def day_lines(r: random.Random, day: date, start: int):
+    """
+    Returns the lines of one day and the minute (of the next day) before which the next day must not start,
+    which is after 0:00 if the last span of the day crosses midnight.
+    """
+    lines = [r.choice([f"## {day.isoformat()}", f"### {day.strftime('%A')} {day.isoformat()}",
+                       f"{day.isoformat()} notes"])]
+    if r.random() < 0.3:
+        lines.append('')
+    columns = r.choice(COLUMN_SETS)
+    lines.append('| ' + ' | '.join(columns) + ' |')
+    lines.append('|' + '|'.join(r.choice(['---', ':--', '--:', '-----']) for _ in columns) + '|')
+
+    t = start
+    next_day_start = 0
+    for n in range(r.randint(3, 9)):
+        length = r.randint(10, 150)
+        if t + length >= 24 * 60:
+            break
+        s, e = t, t + length
+        if n >= 3 and r.random() < 0.03:
+            # a late shift crossing midnight ends the day
+            s, e = max(t, 22 * 60 + r.randint(0, 90)), 24 * 60 + r.randint(15, 120)
+        cells = []
+        for c in columns:
+            if c == 'Time':
+                cells.append(span(s, e, r.random() < 0.7) if r.random() > 0.02 else 'tbd')
+            elif c == 'Task':
+                cells.append(r.choice(TASKS))
+            elif c == 'Duration':
+                cells.append(f"{r.randint(0, 3)}:{r.randint(0, 59):02d}")  # stale, gets recomputed
+            elif c == 'Client':
+                cells.append(r.choice(CLIENTS))
+            else:
+                cells.append(r.choice(NOTES))
+        if r.random() < 0.05:
+            cells = cells[:-1]
+        lines.append('| ' + ' | '.join(cells) + ' |')
+        if e >= 24 * 60:
+            next_day_start = e - 24 * 60 + r.randint(0, 30)
+            break
+        t = e + r.randint(0, 30)
+
+    if r.random() < 0.3 and len(columns) >= 3:
+        # previously generated totals row within the table
+        lines.append('| ' + ' | '.join(['**x**', '**y**', '**Total working time**'] + ['**1:00**'] * (len(columns) - 3)) + ' |')
+    if r.random() < 0.05:
+        lines += ['', 'Total duration: 3:00']
+    lines.append('')
+    if r.random() < 0.04:
+        lines += ['```', '| Time | Task |', '|---|---|', '| 1:00-2:00 | example |', '```', '']
+    if r.random() < 0.03:
+        lines += ['## Links', '', '| Name | Value |', '|---|---|', '| wiki | https://example.org |', '']
+    return lines, next_day_start
+
+def generate(size_bytes: int, seed: int = 1, first_day: date = date(2000, 1, 1)):
+    """Yields the lines of a log of about size_bytes, the same for the same size and seed."""
+    r = random.Random(seed)
+    yield '# Time log'
+    yield ''
+    written = 0
+    day = first_day
+    start = 8 * 60
+    while written < size_bytes:
+        lines, next_day_start = day_lines(r, day, start)
+        for line in lines:
+            written += len(line) + 1
+            yield line
+        day += timedelta(days=1)
+        start = max(next_day_start, r.randint(6, 9) * 60 + r.choice([0, 0, 15, 30]))
+    yield from ['# Task Totals', '', '| Task | Total |', '|---|--:|', '| dev | 1:00 |', '']
+
+def write_log(path: str, size_mb: float, seed: int = 1) -> int:
+    """Writes a log of about size_mb megabytes to path and returns the number of lines."""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in generate(int(size_mb * 1024 * 1024), seed):
+            f.write(line + '\n')
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic time tracking log')
+    parser.add_argument('--size', type=float, default=1.0, help='approximate size in MB')
+    parser.add_argument('--seed', type=int, default=1, help='random seed, the same seed gives the same log')
+    args = parser.parse_args()
+    for line in generate(int(args.size * 1024 * 1024), args.seed):
+        sys.stdout.write(line + '\n')
+
+if __name__ == '__main__':
+    main()
@@ -9,9 +9,21 @@
 - Skips code fences ```...```.
 - Reads from file given as first arg, or stdin if "-" or no arg.
 - Writes result to stdout.
+- With --in-place, takes many files and/or directories (all *.md files within), processes them in parallel
+    and rewrites each file atomically (temp file + rename); the combined Task Totals of all files are written to stdout.
+- Reports all overlapping time periods, also across tables, days (spans crossing midnight) and files,
+    with date, file and line, and exits with 1 if there are any.
+- With --incremental, tables which are unchanged since the last run are passed through without re-processing,
+    using a sidecar cache '.<file>.ttcache.json' next to the file with the per-task minutes of each table.
+- Streams line by line: only the current table is held in memory, output is written as each table completes.
 """
-import sys, re
+import argparse, hashlib, heapq, json, os, shutil, sys, re, tempfile
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 
 def split_row(line: str):
     return [c.strip() for c in line.strip().strip('|').split('|')]
@@ -24,117 +36,198 @@ def format_row(cells, widths, right_align_indices=None):
         padded.append(val.rjust(w) if j in right else val.ljust(w))
     return '| ' + ' | '.join(padded) + ' |'
 
+SEP_CHARS = frozenset(':-')
+
 def is_sep_line(line: str) -> bool:
     s = line.strip()
     if not s.startswith('|'):
         return False
     core = s.replace('|', '').replace(' ', '')
-    return bool(core) and '-' in core and set(core) <= set(':-')
+    return bool(core) and '-' in core and set(core) <= SEP_CHARS
 
 TIME_RE = re.compile(r'\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*')
 DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})')
 DAY_RE = re.compile(r'\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\b', re.I)
 
-def compute_minutes(span: str):
-    m = TIME_RE.fullmatch(span)
-    if not m:
-        return None
-    h1, m1, h2, m2 = map(int, m.groups())
-    start = h1 * 60 + m1
-    end = h2 * 60 + m2
-    if end < start:
-        end += 24 * 60  # cross midnight
-    return end - start
-
 def hmm(minutes: int):
     h = minutes // 60
     m = minutes % 60
     return f"{h}:{m:02d}"
 
-def process_table(lines, i, n):
+# Previously generated in-table or below-table totals rows are recognized by this marker in the third column
+TOTALS_MARKER = 'total working time'
+BOLD_RE = re.compile(r'^\**|\**$')
+TASK_TOTALS_RE = re.compile(r'^\s*#\s*Task\s+Totals\s*$', re.IGNORECASE)
+
+def norm_cell(s: str) -> str:
+    return BOLD_RE.sub('', s or '').strip().lower()
+
+def is_totals_row_line(line: str) -> bool:
+    if not line.lstrip().startswith('|'):
+        return False
+    cells = split_row(line)
+    return len(cells) >= 3 and norm_cell(cells[2]) == TOTALS_MARKER
+
+def is_legacy_total_line(line):
+    return line is not None and line.strip().lower().startswith('total duration:')
+
+class Block:
+    """A part of the document as found by lex(): its original lines and the 1-based number of its first line."""
+    __slots__ = ('lines', 'line_number')
+
+    def __init__(self, lines, line_number):
+        self.lines = lines
+        self.line_number = line_number
+
+class Fence(Block):
+    """A ``` line, opening or closing a code block."""
+
+class Code(Block):
+    """A non-blank line within a code block."""
+
+class Heading(Block):
+    """A Markdown heading line outside of code blocks."""
+
+class Text(Block):
+    """Any other non-blank line outside of code blocks."""
+
+class Blank(Block):
+    """A blank line, within or outside of code blocks."""
+
+class TaskTotals(Block):
+    """A previously generated '# Task Totals' section (title and table), which is re-created at the end."""
+
+class Table(Block):
     """
-    Assumes lines[i] is header row (starts with '|') and lines[i+1] is a separator line.
-    Returns (new_lines_for_table_plus_total, next_index_after_original_table_block, processed_bool, task_minutes_dict)
+    A Markdown table: header, separator and body lines.
+    - title: the nearest non-blank line above, which may contain the date
+    - header: the header cells
+    - time_idx: index of the 'Time' column, None if it is not a time tracking table
+    - trailer: lines below a time tracking table which are dropped on output:
+        a legacy 'Total duration:' line and a previously generated totals row below it, with blank lines
     """
-    header = split_row(lines[i])
-    # Only process tables that have a 'Time' column:
+    __slots__ = ('title', 'header', 'time_idx', 'trailer')
+
+    def __init__(self, lines, line_number, title, header, time_idx, trailer):
+        super().__init__(lines, line_number)
+        self.title = title
+        self.header = header
+        self.time_idx = time_idx
+        self.trailer = trailer
+
+def lex(lines):
+    """
+    Splits the lines into blocks in a single pass, reading them lazily: only the lines of
+    the current block (and a line of lookahead) are held in memory.
+    """
+    reader = LineReader(lines)
+    in_code = False
+    while True:
+        title = reader.last_nonblank
+        line = reader.next()
+        if line is None:
+            return
+        line_number = reader.line_number
+        stripped = line.lstrip()
+
+        # Toggle code fence blocks (``` ... ```)
+        if stripped.startswith('```'):
+            in_code = not in_code
+            yield Fence([line], line_number)
+        elif stripped == '':
+            yield Blank([line], line_number)
+        elif in_code:
+            yield Code([line], line_number)
+
+        # Previously generated "# Task Totals" section (title + following table)
+        elif stripped.startswith('#') and TASK_TOTALS_RE.match(line):
+            section = [line]
+            # Skip optional blank lines
+            while reader.peek() is not None and reader.peek().strip() == '':
+                section.append(reader.next())
+            # If a Markdown table follows, skip it (header + separator + body)
+            if reader.peek(1) is not None and reader.peek().lstrip().startswith('|') and is_sep_line(reader.peek(1)):
+                section.append(reader.next())
+                section.append(reader.next())
+                while reader.peek() is not None and reader.peek().lstrip().startswith('|'):
+                    section.append(reader.next())
+            # Also skip a single trailing blank line after the table if present
+            if reader.peek() is not None and reader.peek().strip() == '':
+                section.append(reader.next())
+            yield TaskTotals(section, line_number)
+
+        # Table start (header row + separator row)
+        elif stripped.startswith('|') and reader.peek() is not None and is_sep_line(reader.peek()):
+            table = [line, reader.next()]
+            while (ahead := reader.peek()) is not None and ahead.lstrip().startswith('|'):
+                table.append(reader.next())
+            header = split_row(line)
+            time_idx = next((idx for idx, c in enumerate(header) if c.lower() == 'time'), None)
+            trailer = []
+            if time_idx is not None and is_legacy_total_line(reader.peek()):
+                # Legacy "Total duration:" single-line summary
+                trailer.append(reader.next())
+                if reader.peek() is not None and reader.peek().strip() == '':
+                    trailer.append(reader.next())
+                # Previously generated totals row as a single Markdown row below the table
+                if reader.peek() is not None and is_totals_row_line(reader.peek()):
+                    trailer.append(reader.next())
+                    if reader.peek() is not None and reader.peek().strip() == '':
+                        trailer.append(reader.next())
+            yield Table(table, line_number, title, header, time_idx, trailer)
+
+        elif stripped.startswith('#'):
+            yield Heading([line], line_number)
+        else:
+            yield Text([line], line_number)
+
+def title_date(title):
+    """Returns the date (YYYY-MM-DD) in the title line above a table, if any."""
+    if title is None:
+        return None
+    s = title.strip()
+    if s.startswith('|') or s.startswith('```'):
+        return None
+    m_date = DATE_RE.search(s)
+    return m_date.group(1) if m_date else None
+
+@lru_cache(maxsize=1024)
+def weekday_name(date_str):
     try:
-        time_idx_in_header = next(idx for idx, c in enumerate(header) if c.strip().lower() == 'time')
-    except StopIteration:
-        # Not a time-tracking table; return original block unchanged
-        j = i + 2
-        while j < n and lines[j].lstrip().startswith('|'):
-            j += 1
-        return lines[i:j], j, False, {}
-
-    # Find table end
-    j = i + 2
-    while j < n and lines[j].lstrip().startswith('|'):
-        j += 1
-    # If there is an immediate totals line below, skip it (we'll re-create or update)
-    k = j
-    # Legacy "Total duration:" single-line summary
-    if k < n and lines[k].strip().lower().startswith('total duration:'):
-        k += 1
-        if k < n and lines[k].strip() == '':
-            k += 1
-    # Previously generated totals row as a single Markdown row below the table
-    if k < n and lines[k].lstrip().startswith('|'):
-        existing_cells = split_row(lines[k])
-        def norm_cell(s: str) -> str:
-            return re.sub(r'^\**|\**$', '', s or '').strip().lower()
-        if len(existing_cells) >= 3 and norm_cell(existing_cells[2]) == 'total working time':
-            # consume existing totals row below (we'll output an updated one)
-            k += 1
-            if k < n and lines[k].strip() == '':
-                k += 1
-    end_after_drop = k
-
-    # Build rows (remove existing Duration column if present)
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
+    except ValueError:
+        return None
+
+def parse_table(table):
+    """
+    Parses the body of a time tracking table (table.time_idx is not None) into (new_header, time_idx, rows):
+    - new_header: the header without an existing Duration column, plus 'Duration' at the end
+    - time_idx: the index of the Time column in new_header
+    - rows: (row, cells, times) with row counted from the header line (0), the cells without
+        the old Duration column, padded to the new header (without Duration), and times as (start, end)
+        minutes of the day, with end beyond 24:00 if crossing midnight, or None if the time is not a valid span.
+    Separator lines and a previously generated totals row at the end are skipped.
+    """
+    header = table.header
     try:
-        old_dur_idx = next(idx for idx, c in enumerate(header) if c.strip().lower() == 'duration')
+        old_dur_idx = next(idx for idx, c in enumerate(header) if c.lower() == 'duration')
     except StopIteration:
         old_dur_idx = None
-
     new_header = [c for idx, c in enumerate(header) if idx != old_dur_idx] + ['Duration']
-
     # Recompute time index in the (potentially) shifted header
-    try:
-        time_idx = next(idx for idx, c in enumerate(new_header) if c.strip().lower() == 'time')
-    except StopIteration:
-        # Should not happen, but be defensive
-        time_idx = 0
+    time_idx = next((idx for idx, c in enumerate(new_header) if c.lower() == 'time'), 0)
 
-    # Identify indices (for reference; totals line will be placed below the table)
-    dur_idx = len(new_header) - 1  # Duration is appended at the end
-
-    # Copy data lines and drop an in-table totals row if present (update it instead)
-    data_lines = lines[i+2:j]
+    data_lines = table.lines[2:]
     # If last non-separator row in the table is a "Total working time" row, drop it
-    def is_totals_row_line(line: str) -> bool:
-        if not line.lstrip().startswith('|'):
-            return False
-        cells = split_row(line)
-        if len(cells) < 3:
-            return False
-        val = re.sub(r'^\**|\**$', '', cells[2] or '').strip().lower()
-        return val == 'total working time'
-
     while data_lines and (is_sep_line(data_lines[-1]) or data_lines[-1].strip() == ''):
         data_lines.pop()
     if data_lines and is_totals_row_line(data_lines[-1]):
         data_lines.pop()
 
     rows = []
-    total_minutes = 0
-    # Collect parsed intervals for overlap detection
-    intervals = []
-    # Per-table aggregation by task (second column)
-    task_minutes = {}
-
-    for line in data_lines:
+    for row, line in enumerate(data_lines, 2):
         # ignore separator-like lines that accidentally appear in body
-        if is_sep_line(line):
+        if '-' in line and is_sep_line(line):
             continue
         cells = split_row(line)
         if old_dur_idx is not None and old_dur_idx < len(cells):
@@ -142,65 +235,55 @@ def process_table(lines, i, n):
         # pad to header-1 (without new Duration)
         while len(cells) < len(new_header) - 1:
             cells.append('')
-        minutes = compute_minutes(cells[time_idx]) if time_idx < len(cells) else None
-        # Track interval for overlap detection (treat end < start as crossing midnight)
-        if minutes is not None:
-            m = TIME_RE.fullmatch(cells[time_idx])
-            if m:
-                h1, m1, h2, m2 = map(int, m.groups())
-                start = h1 * 60 + m1
-                end = h2 * 60 + m2
-                if end < start:
-                    end += 24 * 60
-                intervals.append((start, end, cells[time_idx].strip()))
-        dur = hmm(minutes) if minutes is not None else ''
-        if minutes is not None:
-            total_minutes += minutes
-            # Aggregate by task (second column, index 1 if present)
-            task_key = cells[1].strip() if len(cells) > 1 else ''
-            task_minutes[task_key] = task_minutes.get(task_key, 0) + minutes
-        rows.append(cells + [dur])
-
-    # Extract date and weekday from the nearest non-empty title line above the table
-    title_line = None
-    p = i - 1
-    while p >= 0:
-        s = lines[p].strip()
-        if s == '':
-            p -= 1
+        times = None
+        m = TIME_RE.fullmatch(cells[time_idx]) if time_idx < len(cells) else None
+        if m:
+            h1, m1, h2, m2 = map(int, m.groups())
+            start = h1 * 60 + m1
+            end = h2 * 60 + m2
+            if end < start:
+                end += 24 * 60  # cross midnight
+            times = (start, end)
+        rows.append((row, cells, times))
+    return new_header, time_idx, rows
+
+def render_table(table):
+    """
+    Returns (new_lines_for_table_plus_total, processed_bool, task_minutes_dict, intervals) for a Table block,
+    where intervals are (date_str, start_minute, end_minute, span, row) of the periods in the table,
+    row counted from the header line (0), for the overlap check by IntervalIndex.
+    Tables without a 'Time' column are returned unchanged.
+    """
+    if table.time_idx is None:
+        return table.lines, False, {}, []
+
+    new_header, time_idx, parsed_rows = parse_table(table)
+    # Duration is appended at the end (the totals line will be placed below the table)
+    dur_idx = len(new_header) - 1
+
+    rows = []
+    total_minutes = 0
+    # Collect parsed intervals for overlap detection
+    intervals = []
+    # Per-table aggregation by task (second column)
+    task_minutes = {}
+    date_str = title_date(table.title)
+
+    for row, cells, times in parsed_rows:
+        if times is None:
+            rows.append(cells + [''])
             continue
-        if s.startswith('|') or s.startswith('```'):
-            break
-        title_line = s
-        break
-    date_str = None
-    day_str = None
-    if title_line:
-        m_date = DATE_RE.search(title_line)
-        if m_date:
-            date_str = m_date.group(1)
+        start, end = times
+        minutes = end - start
+        intervals.append((date_str, start, end, cells[time_idx].strip(), row))
+        total_minutes += minutes
+        # Aggregate by task (second column, index 1 if present)
+        task_key = cells[1].strip() if len(cells) > 1 else ''
+        task_minutes[task_key] = task_minutes.get(task_key, 0) + minutes
+        rows.append(cells + [hmm(minutes)])
 
     # Compute weekday strictly from date_str (if available)
-    day_str = None
-    if date_str:
-        try:
-            day_str = datetime.strptime(date_str, "%Y-%m-%d").strftime("%A")
-        except ValueError:
-            day_str = None
-
-    # Overlap detection within a single table (day)
-    if intervals:
-        intervals.sort(key=lambda t: t[0])
-        prev_start, prev_end, prev_span = intervals[0]
-        for cur_start, cur_end, cur_span in intervals[1:]:
-            if cur_start < prev_end:  # overlap (half-open intervals [start, end))
-                day_info = f" for {date_str}" if date_str else ""
-                sys.stderr.write(
-                    f"Error: overlapping time periods{day_info}: '{cur_span}' overlaps with '{prev_span}'.\n"
-                )
-                sys.exit(1)
-            if cur_end > prev_end:
-                prev_start, prev_end, prev_span = cur_start, cur_end, cur_span
+    day_str = weekday_name(date_str) if date_str else None
 
     # Prepare totals "line below table" cells (all values in bold)
     totals_cells = [''] * len(new_header)
@@ -233,122 +316,504 @@ def process_table(lines, i, n):
     sep = '| ' + ' | '.join(sep_cells) + ' |'
 
     # Rebuild table (no totals row inside the table)
-    out = []
-    out.append(format_row(new_header, widths, right_align_indices={dur_idx}))
-    out.append(sep)
+    right = {dur_idx}
+    out = [format_row(new_header, widths, right), sep]
     for r in rows:
-        out.append(format_row(r, widths, right_align_indices={dur_idx}))
+        out.append(format_row(r, widths, right))
     # Append a single totals line BELOW the table, aligned to the same widths
-    out.append(format_row(totals_cells, widths, right_align_indices={dur_idx}))
+    out.append(format_row(totals_cells, widths, right))
 
-    return out, end_after_drop, True, task_minutes
+    # Overlaps are not checked here, but by IntervalIndex across all tables, days and files
+    return out, True, task_minutes, intervals
+
+def table_entries(table):
+    """
+    Yields (row, date_str, start, end, task, columns) for the entries with a valid time span of a time tracking table,
+    with columns as (name, value) of all non-empty cells besides Time, task (second column) and Duration.
+    """
+    new_header, time_idx, rows = parse_table(table)
+    date_str = title_date(table.title)
+    other = [j for j in range(len(new_header) - 1) if j not in (time_idx, 1)]
+    for row, cells, times in rows:
+        if times is None:
+            continue
+        task = cells[1].strip() if len(cells) > 1 else ''
+        yield row, date_str, times[0], times[1], task, [(new_header[j], cells[j]) for j in other if cells[j]]
 
 # ... existing code ...
 
-def process_document(text: str):
-    lines = text.splitlines()
-    n = len(lines)
-    i = 0
-    out = []
-    in_code = False
-    # Global aggregation across all processed tables
-    global_task_minutes = {}
+class LineReader:
+    """
+    Reads lines lazily from an iterable, with a small lookahead buffer.
+    Also remembers the last non-blank line read, which is needed to find the title above a table.
+    """
+    def __init__(self, lines):
+        self._it = iter(lines)
+        self._ahead = deque()
+        self.last_nonblank = None
+        self.line_number = 0
+
+    def peek(self, k=0):
+        """Returns the k-th line ahead (0 = next line) without consuming it, or None at the end."""
+        while len(self._ahead) <= k:
+            try:
+                self._ahead.append(next(self._it))
+            except StopIteration:
+                return None
+        return self._ahead[k]
+
+    def next(self):
+        """Consumes and returns the next line, or None at the end."""
+        line = self._ahead.popleft() if self._ahead else next(self._it, None)
+        if line is None:
+            return None
+        self.line_number += 1
+        if line.strip() != '':
+            self.last_nonblank = line
+        return line
+
+def overlapping_pairs(order, starts, ends):
+    """
+    Yields the (m, n) index pairs of overlapping periods, visiting the periods in the given order by start
+    and keeping the ones still running in a heap by their end: O(n log n) plus the number of pairs.
+    """
+    running = []
+    for n in order:
+        # half-open intervals [start, end): a period ending at the start of another does not overlap
+        while running and running[0][0] <= starts[n]:
+            heapq.heappop(running)
+        for _, m in running:
+            yield m, n
+        heapq.heappush(running, (ends[n], n))
+
+class IntervalIndex:
+    """
+    Index of the time periods of one or more documents, to find overlaps across tables, days and files.
 
-    while i < n:
-        line = lines[i]
+    Periods of tables with a date in their title are placed on one timeline of absolute minutes,
+    so a period crossing midnight is also checked against the entries of the next day.
+    They are kept in parallel arrays (28 bytes per period), so years of entries fit easily.
+    Periods of tables without a (valid) date can only be checked within their own table,
+    which is done right away when the table is added.
+    """
+    def __init__(self):
+        self.starts = array('q')
+        self.ends = array('q')
+        self.lines = array('q')
+        self.source_ids = array('i')
+        self.sources = []
+        self.undated_conflicts = []
+        self._source_ids = {}
+        self._days = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _day(self, date_str):
+        if date_str not in self._days:
+            try:
+                self._days[date_str] = datetime.strptime(date_str, "%Y-%m-%d").toordinal()
+            except (TypeError, ValueError):
+                self._days[date_str] = None
+        return self._days[date_str]
+
+    def _source_id(self, source):
+        if source not in self._source_ids:
+            self._source_ids[source] = len(self.sources)
+            self.sources.append(source)
+        return self._source_ids[source]
+
+    def add(self, source, table_line, intervals):
+        """Adds the periods of the table at table_line (1-based) in source, as returned by render_table."""
+        source_id = None
+        undated = []
+        for date_str, start, end, span, row in intervals:
+            day = self._day(date_str)
+            if day is None:
+                undated.append((start, end, source, table_line + row))
+                continue
+            if source_id is None:
+                source_id = self._source_id(source)
+            offset = day * 24 * 60
+            self.starts.append(offset + start)
+            self.ends.append(offset + end)
+            self.lines.append(table_line + row)
+            self.source_ids.append(source_id)
+        if undated:
+            order = sorted(range(len(undated)), key=lambda n: undated[n][0])
+            starts = [period[0] for period in undated]
+            ends = [period[1] for period in undated]
+            self.undated_conflicts.extend((undated[m], undated[n], False)
+                                          for m, n in overlapping_pairs(order, starts, ends))
+
+    def update(self, other):
+        """Adds all periods of another index, e.g. of another file."""
+        mapping = [self._source_id(source) for source in other.sources]
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+        self.lines.extend(other.lines)
+        self.source_ids.extend(mapping[source_id] for source_id in other.source_ids)
+        self.undated_conflicts.extend(other.undated_conflicts)
+
+    def _period(self, n):
+        return self.starts[n], self.ends[n], self.sources[self.source_ids[n]], self.lines[n]
+
+    def conflicts(self):
+        """
+        Returns all (earlier, later, dated) pairs of overlapping periods, ordered by file and line of the later one,
+        with periods as (start, end, source, line).
+        """
+        starts = self.starts
+        if all(a <= b for a, b in zip(starts, islice(starts, 1, None))):
+            # usual for logs written day by day: no need for the memory of a sorted order
+            order = range(len(starts))
+        else:
+            # a stable sort, so periods with the same start stay in the order they were added
+            order = sorted(range(len(starts)), key=starts.__getitem__)
+        pairs = [(self._period(m), self._period(n), True) for m, n in overlapping_pairs(order, starts, self.ends)]
+        pairs.extend(self.undated_conflicts)
+        pairs.sort(key=lambda pair: (pair[1][2], pair[1][3], pair[0][2], pair[0][3]))
+        return pairs
+
+def describe_period(period, dated):
+    start, end, source, line = period
+    clock = lambda minutes: f"{minutes % (24 * 60) // 60:02d}:{minutes % 60:02d}"
+    day = datetime.fromordinal(start // (24 * 60)).strftime("%Y-%m-%d ") if dated else ''
+    return f"{day}'{clock(start)}-{clock(end)}' ({source}:{line})"
+
+def report_conflicts(pairs, out=None):
+    """Writes an error line per overlapping pair to stderr, returns True if there were any."""
+    out = out or sys.stderr
+    for earlier, later, dated in pairs:
+        out.write(f"Error: overlapping time periods: {describe_period(later, dated)} "
+                  f"overlaps with {describe_period(earlier, dated)}.\n")
+    if pairs:
+        out.write(f"Error: {len(pairs)} overlapping time periods found.\n")
+    return bool(pairs)
+
+def task_totals_section(task_minutes, total_label='**Montly Total**'):
+    """Builds the '# Task Totals' title and table of the given per-task minutes."""
+    out = ['# Task Totals']
+
+    # Prepare table data
+    summary_rows = []
+    header = ['Task', 'Total']
+    # Prepare data rows sorted by task name (case-insensitive)
+    for task in sorted(task_minutes.keys(), key=lambda x: (x or '').lower()):
+        summary_rows.append([task, hmm(task_minutes[task])])
+    # Compute grand total
+    grand_total_minutes = sum(task_minutes.values())
+    totals_row = [total_label, f'**{hmm(grand_total_minutes)}**']
+
+    # Compute widths (include totals row for sizing)
+    widths = [len(h) for h in header]
+    for r in summary_rows + [totals_row]:
+        for col, val in enumerate(r):
+            if len(val) > widths[col]:
+                widths[col] = len(val)
 
-        # Toggle code fence blocks (``` ... ```)
-        if re.match(r'^\s*```', line):
-            in_code = not in_code
-            out.append(line)
-            i += 1
-            continue
+    # Build separator with right alignment for Total column (index 1)
+    sep_cells = []
+    for idx, w in enumerate(widths):
+        w2 = max(3, w)
+        if idx == 1:
+            sep_cells.append('-' * (w2 - 1) + ':')
+        else:
+            sep_cells.append('-' * w2)
+    sep = '| ' + ' | '.join(sep_cells) + ' |'
 
-        # Remove previously generated "# Task Totals" section (title + following table)
-        if not in_code and re.match(r'^\s*#\s*Task\s+Totals\s*$', line, re.IGNORECASE):
-            # Skip the title line
-            i += 1
-            # Skip optional blank lines
-            while i < n and lines[i].strip() == '':
-                i += 1
-            # If a Markdown table follows, skip it (header + separator + body)
-            if i + 1 < n and lines[i].lstrip().startswith('|') and is_sep_line(lines[i+1]):
-                i += 2
-                while i < n and lines[i].lstrip().startswith('|'):
-                    i += 1
-            # Also skip a single trailing blank line after the table if present
-            if i < n and lines[i].strip() == '':
-                i += 1
-            continue
+    # Table
+    out.append(format_row(header, widths, right_align_indices={1}))
+    out.append(sep)
+    for r in summary_rows:
+        out.append(format_row(r, widths, right_align_indices={1}))
+    # Append bold totals row at the end
+    out.append(format_row(totals_row, widths, right_align_indices={1}))
+    return out
 
-        # Detect table start (header row + separator row) outside code
-        if not in_code and line.lstrip().startswith('|') and i + 1 < n and is_sep_line(lines[i+1]):
-            new_block, next_i, processed, task_minutes = process_table(lines, i, n)
-            out.extend(new_block)
-            # Merge per-table aggregation into global map
-            if processed and task_minutes:
-                for k, v in task_minutes.items():
-                    global_task_minutes[k] = global_task_minutes.get(k, 0) + v
-            i = next_i
+class TableCache:
+    """
+    Sidecar cache of already processed tables, stored as JSON next to the Markdown file.
+
+    A table is identified by the hash of its title line and its rendered lines. As processing
+    a rendered table yields the very same lines, a table found in the cache is unchanged since
+    the last run and can be passed through as is, with its per-task minutes taken from the cache.
+    Only the tables seen in the current run are saved, so entries of edited tables do not pile up.
+    """
+    VERSION = 2
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.used = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                self.entries = data.get('tables', {})
+        except (OSError, ValueError, AttributeError):
+            pass  # no or unusable cache: everything gets processed
+
+    @staticmethod
+    def path_for(md_path):
+        directory, name = os.path.split(md_path)
+        return os.path.join(directory, '.' + name + '.ttcache.json')
+
+    @staticmethod
+    def key(title_line, table_lines):
+        digest = hashlib.sha256((title_line or '').encode('utf-8'))
+        for line in table_lines:
+            digest.update(b'\n')
+            digest.update(line.encode('utf-8'))
+        return digest.hexdigest()
+
+    def lookup(self, title_line, table_lines):
+        """Returns the cached (task_minutes, intervals) of an unchanged table, or None."""
+        key = self.key(title_line, table_lines)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used[key] = entry
+        return entry['tasks'], [tuple(interval) for interval in entry['intervals']]
+
+    def store(self, title_line, table_lines, task_minutes, intervals):
+        self.used[self.key(title_line, table_lines)] = {'tasks': task_minutes, 'intervals': intervals}
+
+    def write_temp(self):
+        """Writes the entries used in this run to a temp file next to the cache and returns its path."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'tables': self.used}, f, ensure_ascii=False)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    def save(self):
+        """Writes the entries used in this run atomically (temp file + rename)."""
+        os.replace(self.write_temp(), self.path)
+
+def process_lines(lines, global_task_minutes=None, cache=None, index=None, source='<stdin>', on_table=None):
+    """
+    Streaming variant of process_document: consumes the blocks of lex() and yields output lines
+    as soon as they are final. Only the current table is buffered,
+    so memory is bounded by the largest table rather than by the document.
+
+    The per-task minutes of all processed tables are accumulated into global_task_minutes, if given.
+    With a TableCache, tables unchanged since the last run are passed through without re-processing.
+    The time periods of all tables are added to the IntervalIndex, if given, with source and line.
+    on_table, if given, is called with the Table block of every time tracking table, e.g. to export its entries.
+    """
+    # Global aggregation across all processed tables
+    if global_task_minutes is None:
+        global_task_minutes = {}
+    # Blank output lines are held back, because they are dropped before a trailing Task Totals section
+    held_blanks = []
+
+    for block in lex(lines):
+        kind = type(block)
+        if kind is Blank:
+            held_blanks.append(block.lines[0])
+            continue
+        # Remove previously generated "# Task Totals" section, it is re-created at the end
+        if kind is TaskTotals:
+            continue
+        if held_blanks:
+            yield from held_blanks
+            held_blanks.clear()
+        if kind is not Table:
+            yield block.lines[0]
             continue
 
-        # Default: passthrough
-        out.append(line)
-        i += 1
+        # An unchanged table is passed through, unless a legacy totals line below still needs to be dropped
+        cached = None
+        if cache is not None and not block.trailer:
+            cached = cache.lookup(block.title, block.lines)
+        if cached is not None:
+            new_lines, processed = block.lines, True
+            task_minutes, table_intervals = cached
+        else:
+            new_lines, processed, task_minutes, table_intervals = render_table(block)
+            if cache is not None:
+                cache.store(block.title, new_lines, task_minutes, table_intervals)
+        if index is not None:
+            index.add(source, block.line_number, table_intervals)
+        if on_table is not None and processed:
+            on_table(block)
+        yield from new_lines
+        # Merge per-table aggregation into global map
+        if processed and task_minutes:
+            for k, v in task_minutes.items():
+                global_task_minutes[k] = global_task_minutes.get(k, 0) + v
 
     # Append summary title and table by task at the end (outside code fences), if any data collected
     if global_task_minutes:
         # Ensure exactly one blank line before the title
-        while out and out[-1].strip() == '':
-            out.pop()
-        out.append('')
-        out.append('# Task Totals')
-
-        # Prepare table data
-        summary_rows = []
-        header = ['Task', 'Total']
-        # Prepare data rows sorted by task name (case-insensitive)
-        for task in sorted(global_task_minutes.keys(), key=lambda x: (x or '').lower()):
-            summary_rows.append([task, hmm(global_task_minutes[task])])
-        # Compute grand total
-        grand_total_minutes = sum(global_task_minutes.values())
-        totals_row = ['**Montly Total**', f'**{hmm(grand_total_minutes)}**']
-
-        # Compute widths (include totals row for sizing)
-        widths = [len(h) for h in header]
-        for r in summary_rows + [totals_row]:
-            for col, val in enumerate(r):
-                if len(val) > widths[col]:
-                    widths[col] = len(val)
-
-        # Build separator with right alignment for Total column (index 1)
-        sep_cells = []
-        for idx, w in enumerate(widths):
-            w2 = max(3, w)
-            if idx == 1:
-                sep_cells.append('-' * (w2 - 1) + ':')
-            else:
-                sep_cells.append('-' * w2)
-        sep = '| ' + ' | '.join(sep_cells) + ' |'
-
-        # Table
-        out.append(format_row(header, widths, right_align_indices={1}))
-        out.append(sep)
-        for r in summary_rows:
-            out.append(format_row(r, widths, right_align_indices={1}))
-        # Append bold totals row at the end
-        out.append(format_row(totals_row, widths, right_align_indices={1}))
-
-    return '\n'.join(out)
+        yield ''
+        yield from task_totals_section(global_task_minutes)
+    else:
+        yield from held_blanks
+
+def process_document(text: str):
+    index = IntervalIndex()
+    result = '\n'.join(process_lines(text.splitlines(), index=index, source='<document>'))
+    if report_conflicts(index.conflicts()):
+        sys.exit(1)
+    return result
+
+def write_lines(lines, out, chunk_size=1000):
+    """Writes the lines separated (not terminated) by newlines, like '\\n'.join(lines), in bounded chunks."""
+    chunk = []
+    separator = ''
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            out.write(separator + '\n'.join(chunk))
+            separator = '\n'
+            chunk.clear()
+    if chunk:
+        out.write(separator + '\n'.join(chunk))
+
+def render_file(path, incremental=False):
+    """
+    First phase of rewriting a file in place: writes the result to a temp file in the same directory
+    (and the updated cache to a temp file next to the cache, if incremental), without touching the originals,
+    so all files can be checked for overlaps before any of them is replaced.
+    Returns the (temp_path, path) renames to apply, the per-task minutes and an IntervalIndex of the time periods.
+    """
+    task_minutes = {}
+    index = IntervalIndex()
+    cache = TableCache(TableCache.path_for(path)) if incremental else None
+    directory = os.path.dirname(os.path.abspath(path))
+    renames = []
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+        renames.append((tmp_path, path))
+        with open(path, 'r', encoding='utf-8') as f, os.fdopen(fd, 'w', encoding='utf-8') as out:
+            write_lines(process_lines((line.rstrip('\n') for line in f), task_minutes, cache, index, path), out)
+            out.flush()
+            os.fsync(out.fileno())
+        shutil.copymode(path, tmp_path)
+        if cache is not None:
+            renames.append((cache.write_temp(), cache.path))
+    except BaseException:
+        discard_renames(renames)
+        raise
+    return renames, task_minutes, index
+
+def apply_renames(renames):
+    """Second phase: atomically replaces each original by its temp file."""
+    for tmp_path, path in renames:
+        os.replace(tmp_path, path)
+
+def discard_renames(renames):
+    for tmp_path, _ in renames:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def collect_files(paths):
+    """Expands directories to the *.md files within (sorted), keeps files as given, drops duplicates."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.endswith('.md') and os.path.isfile(os.path.join(path, name))))
+        else:
+            files.append(path)
+    return list(dict.fromkeys(files))
+
+def process_files(files, jobs=None, incremental=False):
+    """
+    Rewrites all files in place, rendered in parallel with a process pool.
+    The files are only replaced if all of them could be processed and there are no overlapping
+    time periods in any of them, otherwise all are left untouched.
+    Returns the per-task minutes accumulated across all files, the list of files which failed
+    and the overlapping pairs of time periods.
+    """
+    yearly_task_minutes = {}
+    failed = []
+    rendered = []
+    index = IntervalIndex()
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [(path, pool.submit(render_file, path, incremental)) for path in files]
+            # collected in input order, so the result does not depend on scheduling
+            for path, future in futures:
+                try:
+                    renames, task_minutes, file_index = future.result()
+                except Exception as e:  # any error of a worker (or a crashed worker) only fails its file
+                    sys.stderr.write(f"Error: {path}: {e}\n")
+                    failed.append(path)
+                    continue
+                rendered.append(renames)
+                index.update(file_index)
+                for k, v in task_minutes.items():
+                    yearly_task_minutes[k] = yearly_task_minutes.get(k, 0) + v
+                sys.stderr.write(f"{path}: {hmm(sum(task_minutes.values()))}\n")
+    except BaseException:
+        # e.g. interrupted: the temp files of the files rendered so far must not be left behind
+        for renames in rendered:
+            discard_renames(renames)
+        raise
+
+    conflicts = index.conflicts()
+    for renames in rendered:
+        if failed or conflicts:
+            discard_renames(renames)
+        else:
+            apply_renames(renames)
+    return yearly_task_minutes, failed, conflicts
 
 def main():
-    if len(sys.argv) > 1 and sys.argv[1] != '-':
-        with open(sys.argv[1], 'r', encoding='utf-8') as f:
-            text = f.read()
+    parser = argparse.ArgumentParser(description='Adds Duration columns and totals to Markdown time tracking tables.')
+    parser.add_argument('paths', nargs='*', help='input file, "-" or none for stdin; with --in-place: files and/or directories')
+    parser.add_argument('-i', '--in-place', action='store_true',
+                        help='rewrite the files in place and print the combined Task Totals of all files')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only re-process tables changed since the last run, using a sidecar cache next to each file')
+    parser.add_argument('-j', '--jobs', type=int, help='number of parallel processes for --in-place (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.in_place:
+        if not args.paths or '-' in args.paths:
+            parser.error('--in-place needs files or directories')
+        files = collect_files(args.paths)
+        yearly_task_minutes, failed, conflicts = process_files(files, args.jobs, args.incremental)
+        report_conflicts(conflicts)
+        if failed:
+            sys.stderr.write(f"Error: {len(failed)} of {len(files)} files not processed: {', '.join(failed)}\n")
+        if failed or conflicts:
+            sys.stderr.write("Error: no files were changed.\n")
+            sys.exit(1)
+        if yearly_task_minutes:
+            write_lines(task_totals_section(yearly_task_minutes, '**Yearly Total**'), sys.stdout)
+            sys.stdout.write('\n')
+        return
+
+    if len(args.paths) > 1:
+        parser.error('multiple files need --in-place')
+    index = IntervalIndex()
+    if args.paths and args.paths[0] != '-':
+        source = args.paths[0]
+        cache = TableCache(TableCache.path_for(source)) if args.incremental else None
+        with open(source, 'r', encoding='utf-8') as f:
+            write_lines(process_lines((line.rstrip('\n') for line in f), cache=cache, index=index, source=source), sys.stdout)
+        if cache is not None:
+            cache.save()
     else:
-        text = sys.stdin.read()
+        if args.incremental:
+            parser.error('--incremental needs a file, the cache is stored next to it')
+        write_lines(process_lines((line.rstrip('\n') for line in sys.stdin), index=index), sys.stdout)
 
-    sys.stdout.write(process_document(text))
+    # the output is already written when streaming, but the exit code tells about overlapping time periods
+    if report_conflicts(index.conflicts()):
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stores the time entries of the Markdown time tracking files in an indexed SQLite database
+and answers grouped and date range reports from it, without re-parsing the Markdown files.
+
+- 'export DB FILE_OR_DIR...' parses the files (and the *.md files of directories) the same way as timetracker.py
+    and stores one row per entry: file, line, date, start and end minute, duration, task (second column),
+    and the values of all other columns. Unchanged files (same size and mtime) are skipped, changed files are replaced,
+    files which no longer exist are removed.
+- 'report DB --by week --by task --from 2025-01-01 --to 2025-03-31' prints the summed durations grouped
+    by day, week, month, year, weekday, task or any other column (column:NAME) as a Markdown table.
+"""
+import argparse, os, sqlite3, sys
+from datetime import datetime
+
+from timetracker import collect_files, format_row, hmm, process_lines, table_entries
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    line INTEGER NOT NULL,
+    date TEXT,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    minutes INTEGER NOT NULL,
+    task TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entry_columns (
+    entry_id INTEGER NOT NULL REFERENCES entries(id),
+    name TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_date ON entries(date);
+CREATE INDEX IF NOT EXISTS entries_task_date ON entries(task, date);
+CREATE INDEX IF NOT EXISTS entries_file ON entries(file_id);
+CREATE INDEX IF NOT EXISTS entry_columns_entry ON entry_columns(entry_id);
+CREATE INDEX IF NOT EXISTS entry_columns_name_value ON entry_columns(name, value);
+'''
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# SQL expression per --by dimension, column:NAME is handled separately
+GROUPS = {
+    'day': "e.date",
+    'week': "strftime('%Y-W%W', e.date)",  # week of year, starting on Monday
+    'month': "substr(e.date, 1, 7)",
+    'year': "substr(e.date, 1, 4)",
+    'weekday': "(CAST(strftime('%w', e.date) AS INTEGER) + 6) % 7",  # 0 = Monday, so it sorts Monday first
+    'task': "e.task",
+}
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+def delete_entries(db, file_id):
+    db.execute('DELETE FROM entry_columns WHERE entry_id IN (SELECT id FROM entries WHERE file_id = ?)', (file_id,))
+    db.execute('DELETE FROM entries WHERE file_id = ?', (file_id,))
+
+def export_file(db, path, force=False):
+    """Replaces the entries of the given file in the database, unless it is unchanged. Returns the number of entries."""
+    # the same file given as relative path, via a symlink etc. must not be stored twice
+    path = os.path.realpath(path)
+    stat = os.stat(path)
+    known = db.execute('SELECT id, size, mtime_ns FROM files WHERE path = ?', (path,)).fetchone()
+    if known and not force and known[1:] == (stat.st_size, stat.st_mtime_ns):
+        return None
+    if known:
+        file_id = known[0]
+        delete_entries(db, file_id)
+        db.execute('UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?', (stat.st_size, stat.st_mtime_ns, file_id))
+    else:
+        file_id = db.execute('INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)',
+                             (path, stat.st_size, stat.st_mtime_ns)).lastrowid
+
+    count = 0
+    def on_table(table):
+        nonlocal count
+        for row, date_str, start, end, task, columns in table_entries(table):
+            entry_id = db.execute(
+                'INSERT INTO entries (file_id, line, date, start, end, minutes, task) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (file_id, table.line_number + row, date_str, start, end, end - start, task)).lastrowid
+            db.executemany('INSERT INTO entry_columns (entry_id, name, value) VALUES (?, ?, ?)',
+                           [(entry_id, name, value) for name, value in columns])
+            count += 1
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for _ in process_lines((line.rstrip('\n') for line in f), source=path, on_table=on_table):
+            pass
+    return count
+
+def remove_missing_files(db):
+    """
+    Removes the files which no longer exist, and their entries, from the database, as well as files stored
+    under a path which is not normalised, by earlier versions, if they are also stored under the normalised path.
+    Returns their paths.
+    """
+    files = db.execute('SELECT id, path FROM files').fetchall()
+    stored = {path for _, path in files}
+    missing = [(file_id, path) for file_id, path in files
+               if not os.path.isfile(path) or (os.path.realpath(path) != path and os.path.realpath(path) in stored)]
+    for file_id, path in missing:
+        delete_entries(db, file_id)
+        db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+    return [path for _, path in missing]
+
+def export(db_path, paths, force=False):
+    db = connect(db_path)
+    try:
+        for path in collect_files(paths):
+            with db:  # one transaction per file
+                count = export_file(db, path, force)
+            sys.stderr.write(f"{path}: {'unchanged' if count is None else f'{count} entries'}\n")
+        with db:
+            for path in remove_missing_files(db):
+                sys.stderr.write(f"{path}: removed, the file no longer exists\n")
+    finally:
+        db.close()
+
+def parse_date(value):
+    """argparse type for YYYY-MM-DD dates."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a YYYY-MM-DD date: {value}")
+
+def parse_group(value):
+    """argparse type for --by: one of GROUPS or column:NAME."""
+    if value in GROUPS or (value.startswith('column:') and len(value) > len('column:')):
+        return value
+    raise argparse.ArgumentTypeError(f"expected one of {', '.join(GROUPS)} or column:NAME, got {value}")
+
+def query_report(db, by=(), date_from=None, date_to=None, task=None):
+    """Returns the rows (group values..., minutes) of the summed durations, grouped by the given dimensions."""
+    joins, selects, params = [], [], []
+    for n, group in enumerate(by):
+        if group.startswith('column:'):
+            joins.append(f"LEFT JOIN entry_columns c{n} ON c{n}.entry_id = e.id AND c{n}.name = ?")
+            params.append(group[len('column:'):])
+            selects.append(f"coalesce(c{n}.value, '')")
+        else:
+            selects.append(GROUPS[group])
+    where, where_params = [], []
+    if date_from:
+        where.append('e.date >= ?')
+        where_params.append(date_from)
+    if date_to:
+        where.append('e.date <= ?')
+        where_params.append(date_to)
+    if task is not None:
+        where.append('e.task = ?')
+        where_params.append(task)
+
+    columns = [f"{expr} AS g{n}" for n, expr in enumerate(selects)]
+    sql = f"SELECT {', '.join(columns + ['sum(e.minutes)'])} FROM entries e {' '.join(joins)}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if selects:
+        group_by = ', '.join(f"g{n}" for n in range(len(selects)))
+        sql += f" GROUP BY {group_by} ORDER BY {group_by}"
+    return db.execute(sql, params + where_params).fetchall()
+
+def report_section(by, rows, total_label='**Total**'):
+    """Builds a Markdown table of the report rows, with a bold total row, like the Task Totals of timetracker.py."""
+    header = [group.split(':', 1)[-1].capitalize() for group in by] + ['Total']
+    body = []
+    for *groups, minutes in (rows if by else []):  # without groups, the total row is all there is
+        labels = []
+        for group, value in zip(by, groups):
+            if value is None:
+                value = '(no date)'
+            elif group == 'weekday':
+                value = WEEKDAYS[int(value)]
+            labels.append(str(value))
+        body.append(labels + [hmm(minutes or 0)])
+    totals_row = [total_label] + [''] * (len(header) - 2) + [f"**{hmm(sum(r[-1] or 0 for r in rows))}**"]
+    if len(header) == 1:
+        totals_row = totals_row[1:]
+
+    widths = [len(h) for h in header]
+    for r in body + [totals_row]:
+        for col, val in enumerate(r):
+            widths[col] = max(widths[col], len(val))
+    total_idx = len(header) - 1
+    sep_cells = ['-' * (max(3, w) - 1) + ':' if idx == total_idx else '-' * max(3, w) for idx, w in enumerate(widths)]
+    out = [format_row(header, widths, right_align_indices={total_idx}), '| ' + ' | '.join(sep_cells) + ' |']
+    for r in body:
+        out.append(format_row(r, widths, right_align_indices={total_idx}))
+    out.append(format_row(totals_row, widths, right_align_indices={total_idx}))
+    return out
+
+def report(db_path, by, date_from=None, date_to=None, task=None):
+    if not os.path.exists(db_path):
+        sys.stderr.write(f"Error: {db_path} does not exist, run 'export' first.\n")
+        sys.exit(1)
+    db = sqlite3.connect(db_path)
+    try:
+        rows = query_report(db, by, date_from, date_to, task)
+    finally:
+        db.close()
+    print('\n'.join(report_section(by, rows)))
+
+def main():
+    parser = argparse.ArgumentParser(description='Stores time tracking entries in SQLite and reports from them.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help='parse Markdown files and store their entries')
+    export_parser.add_argument('db', help='SQLite database file, created if missing')
+    export_parser.add_argument('paths', nargs='+', help='Markdown files and/or directories with *.md files')
+    export_parser.add_argument('--force', action='store_true', help='re-export files even if they are unchanged')
+
+    report_parser = commands.add_parser('report', help='print summed durations, grouped and filtered')
+    report_parser.add_argument('db', help='SQLite database file written by export')
+    report_parser.add_argument('--by', action='append', type=parse_group, default=[],
+                               help=f"group by {', '.join(GROUPS)} or column:NAME, can be repeated")
+    report_parser.add_argument('--from', dest='date_from', type=parse_date, help='first date to include (YYYY-MM-DD)')
+    report_parser.add_argument('--to', dest='date_to', type=parse_date, help='last date to include (YYYY-MM-DD)')
+    report_parser.add_argument('--task', help='only entries of this task')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export(args.db, args.paths, args.force)
+    else:
+        report(args.db, args.by, args.date_from, args.date_to, args.task)
+
+if __name__ == '__main__':
+    main()
@@ -1,71 +1,343 @@
 import atexit
+import csv
+import os
 import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, Optional, TextIO
 
-db_connection = sqlite3.connect("db.sqlite3")
+DB_PATH = "db.sqlite3"
 
-def init_db():
-    db_connection.execute("""
+INSERT_TIMESTAMP = "INSERT INTO timestamps (id, timestamp) VALUES (?, ?)"
+
+def connect(path: str = DB_PATH) -> sqlite3.Connection:
+    """
+    Open a connection tuned for many small writes.
+
+    Args:
+        path: The database file
+    """
+    connection = sqlite3.connect(path, check_same_thread=False)
+    # readers and the writer don't block each other, and a commit appends to the log instead of rewriting pages
+    connection.execute("PRAGMA journal_mode=WAL")
+    # no fsync per commit, in WAL mode the database still can't get corrupted, only the last commits can be lost
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=5000")
+    connection.execute("PRAGMA cache_size=-16000")  # 16 MB
+    connection.execute("PRAGMA temp_store=MEMORY")
+    return connection
+
+db_connection = connect()
+
+def init_db(connection: sqlite3.Connection = db_connection):
+    connection.execute("""
             CREATE TABLE IF NOT EXISTS timestamps (
                 id INTEGER PRIMARY KEY,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
+    # for the ordering and the time range filters, the id is part of every index entry
+    connection.execute("CREATE INDEX IF NOT EXISTS timestamps_timestamp ON timestamps (timestamp)")
 
     print("Database initialised.")
 
+def utc_now() -> str:
+    """The current time in the format of SQLite's CURRENT_TIMESTAMP."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+def report_error(id: int, error: Exception) -> None:
+    print(f"Error writing timestamp {id}: {error}")
+
+class TimestampWriter:
+    """
+    Write-behind buffer for timestamp records.
+
+    write() only appends to a buffer. A background thread inserts the buffered records with executemany,
+    in one transaction, as soon as batch_size records are waiting or flush_interval seconds have passed.
+    The timestamp is taken when write() is called, not when the record is inserted.
+    """
+
+    def __init__(self, path: str = DB_PATH, batch_size: int = 1000, flush_interval: float = 0.5,
+                 on_error: Callable[[int, Exception], None] = report_error):
+        """
+        Args:
+            path: The database file, it gets its own connection
+            batch_size: Number of buffered records that triggers an insert
+            flush_interval: Maximum seconds a record waits in the buffer
+            on_error: Called with the id and the exception of each record that could not be inserted,
+                also for all records of a batch that failed for another reason, e.g. a locked or full database
+        """
+        self.connection = connect(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_error = on_error
+        self.written = 0
+        self.failed = 0
+        self._buffer: list[tuple[int, str]] = []
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="TimestampWriter", daemon=True)
+        self._thread.start()
+
+    def write(self, id: int, timestamp: Optional[str] = None) -> None:
+        """
+        Buffer a timestamp record.
+
+        Args:
+            id: The ID of the associated record
+            timestamp: The time to store, now by default
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("TimestampWriter is closed")
+            self._buffer.append((id, timestamp or utc_now()))
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self) -> None:
+        """Insert all buffered records now."""
+        with self._condition:
+            batch, self._buffer = self._buffer, []
+        if batch:
+            with self._write_lock:
+                self._insert(batch)
+
+    def close(self) -> None:
+        """Insert the remaining records, stop the background thread and close the connection."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.flush()
+        self.connection.close()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or len(self._buffer) >= self.batch_size,
+                                         timeout=self.flush_interval)
+                if self._closed:
+                    return  # close() flushes what is left
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"TimestampWriter: unexpected error: {e!r}")  # the thread must keep running
+
+    def _insert(self, batch: list[tuple[int, str]], retries: int = 1) -> None:
+        try:
+            try:
+                with self.connection:
+                    self.connection.executemany(INSERT_TIMESTAMP, batch)
+                self.written += len(batch)
+            except sqlite3.IntegrityError:
+                # the batch was rolled back: insert it again row by row, still in one transaction,
+                # a failing INSERT only aborts itself, not the transaction
+                duplicates = []
+                with self.connection:
+                    for record in batch:
+                        try:
+                            self.connection.execute(INSERT_TIMESTAMP, record)
+                        except sqlite3.IntegrityError as e:
+                            duplicates.append((record[0], e))
+                # counted and reported only once committed, a rolled back transaction is retried
+                self.written += len(batch) - len(duplicates)
+                self.failed += len(duplicates)
+                for id, e in duplicates:
+                    self.on_error(id, e)
+        except sqlite3.Error as e:
+            # e.g. locked longer than busy_timeout, disk full or I/O error: the transaction was rolled back
+            if retries:
+                time.sleep(self.flush_interval)
+                self._insert(batch, retries - 1)
+                return
+            self.failed += len(batch)
+            for id, _ in batch:
+                self.on_error(id, e)
+
+timestamp_writer = TimestampWriter()
+
 def write_timestamp(id: int) -> None:
     """
-    Write a timestamp record to the database.
+    Write a timestamp record to the database, in the background.
+
+    Args:
+        id: The ID of the associated record
+    """
+    timestamp_writer.write(id)
+
+def write_timestamp_per_row(connection: sqlite3.Connection, id: int) -> None:
+    """
+    Write a timestamp record with its own commit, the way it was done before the write-behind buffer.
 
     Args:
+        connection: The database connection
         id: The ID of the associated record
     """
     try:
-        db_connection.execute("""
+        connection.execute("""
             INSERT INTO timestamps (id, timestamp)
             VALUES (?, CURRENT_TIMESTAMP)
         """, (id,))
-        db_connection.commit()
+        connection.commit()
     except Exception as e:
         print(f"Error writing timestamp: {e}")
 
 
-def print_timestamps() -> None:
+def query_timestamps(since: Optional[str] = None, until: Optional[str] = None,
+                     ids: Optional[Iterable[int]] = None, min_id: Optional[int] = None, max_id: Optional[int] = None,
+                     after: Optional[tuple[str, int]] = None, limit: Optional[int] = None, newest_first: bool = True,
+                     connection: sqlite3.Connection = db_connection) -> Iterator[tuple[int, str]]:
     """
-    Print all timestamps from the database in a formatted way.
+    Yield (id, timestamp) records ordered by timestamp and id, one at a time from the cursor,
+    so the full result is never loaded into memory. Records still in the write-behind buffer are not included.
+
+    Args:
+        since: Only timestamps >= since ("YYYY-MM-DD HH:MM:SS" or a prefix like "YYYY-MM-DD")
+        until: Only timestamps < until
+        ids: Only these IDs
+        min_id: Only IDs >= min_id
+        max_id: Only IDs <= max_id
+        after: Keyset of the last record of the previous page (timestamp, id), only records after it are returned
+        limit: Maximum number of records
+        newest_first: Order by descending timestamp and id
+        connection: The database connection
     """
-    cursor = db_connection.cursor()
+    where, params = [], []
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("timestamp < ?")
+        params.append(until)
+    if ids is not None:
+        ids = list(ids)
+        where.append(f"id IN ({', '.join('?' * len(ids))})")
+        params += ids
+    if min_id is not None:
+        where.append("id >= ?")
+        params.append(min_id)
+    if max_id is not None:
+        where.append("id <= ?")
+        params.append(max_id)
+    if after is not None:
+        # continues where the previous page ended using the index, unlike OFFSET which reads all skipped rows
+        where.append(f"(timestamp, id) {'<' if newest_first else '>'} (?, ?)")
+        params += after
+    order = "DESC" if newest_first else "ASC"
+    sql = "SELECT id, timestamp FROM timestamps"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY timestamp {order}, id {order}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    cursor = connection.execute(sql, params)
     try:
-        cursor.execute("""
-            SELECT id, timestamp 
-            FROM timestamps 
-            ORDER BY timestamp DESC
-        """)
+        yield from cursor
+    finally:
+        cursor.close()
 
-        records = cursor.fetchall()
+def fetch_page(page_size: int = 50, after: Optional[tuple[str, int]] = None,
+               **filters) -> tuple[list[tuple[int, str]], Optional[tuple[str, int]]]:
+    """
+    Return one page of records and the keyset to pass as after for the next page (None when the page is not full).
+
+    Args:
+        page_size: Number of records per page
+        after: Keyset returned with the previous page, None for the first page
+        filters: Further arguments of query_timestamps
+    """
+    records = list(query_timestamps(after=after, limit=page_size, **filters))
+    next_key = (records[-1][1], records[-1][0]) if len(records) == page_size else None
+    return records, next_key
+
+def export_csv(file: TextIO, **filters) -> int:
+    """
+    Write the records as CSV, streaming them from the database, and return their number.
+
+    Args:
+        file: A text file opened with newline=""
+        filters: Arguments of query_timestamps
+    """
+    writer = csv.writer(file)
+    writer.writerow(["id", "timestamp"])
+    count = 0
+    for record in query_timestamps(**filters):
+        writer.writerow(record)
+        count += 1
+    return count
+
+def print_timestamps(limit: int = 10) -> None:
+    """
+    Print a summary of the timestamps: their number and range, and the newest records.
 
-        if not records:
+    Args:
+        limit: Maximum number of records printed
+    """
+    try:
+        total, oldest, newest = db_connection.execute(
+            "SELECT count(*), min(timestamp), max(timestamp) FROM timestamps").fetchone()
+
+        if not total:
             print("No timestamps found.")
             return
 
-        print("\nTimestamps:")
+        print("\nNewest timestamps:")
         print("-" * 50)
         print(f"{'ID':^5} | {'Timestamp':^25}")
         print("-" * 50)
 
-        for id, timestamp in records:
+        for id, timestamp in query_timestamps(limit=limit):
             print(f"{id:^5} | {timestamp:^25}")
 
         print("-" * 50)
-        print(f"Total records: {len(records)}")
+        if total > limit:
+            print(f"... and {total - limit} older records")
+        print(f"Total records: {total}, from {oldest} to {newest}")
 
     except Exception as e:
         print(f"Error reading timestamps: {e}")
-    finally:
-        cursor.close()
+
+def benchmark(records: int = 5000) -> None:
+    """
+    Compare the throughput of per-row commits (default journal) with the write-behind buffer (WAL).
+
+    Args:
+        records: Number of records written by each variant
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "per_row.sqlite3"))
+        init_db(connection)
+        started = time.perf_counter()
+        for id in range(records):
+            write_timestamp_per_row(connection, id)
+        per_row = time.perf_counter() - started
+        connection.close()
+
+        path = os.path.join(directory, "write_behind.sqlite3")
+        connection = connect(path)
+        init_db(connection)
+        connection.close()
+        started = time.perf_counter()
+        writer = TimestampWriter(path)
+        for id in range(records):
+            writer.write(id)
+        writer.close()  # includes waiting for the last insert
+        write_behind = time.perf_counter() - started
+
+    print(f"per-row commit: {records / per_row:>10.0f} records/s")
+    print(f"write-behind:   {records / write_behind:>10.0f} records/s ({per_row / write_behind:.0f}x)")
 
 @atexit.register
 def exit_handler():
+    timestamp_writer.close()  # the buffered records must not get lost
     db_connection.commit()
     print_timestamps()
     db_connection.close()
@@ -73,8 +345,14 @@ def exit_handler():
 
 if __name__ == "__main__":
     init_db()
+    if sys.argv[1:2] == ["--benchmark"]:
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
+        sys.exit()
+    if sys.argv[1:2] == ["--export"]:
+        with open(sys.argv[2], "w", newline="", encoding="utf-8") as f:
+            print(f"{export_csv(f)} records exported to {sys.argv[2]}")
+        sys.exit()
     write_timestamp(1)
     write_timestamp(2)
     write_timestamp(3)
-    write_timestamp(1) # will throw an exception due to the duplicate key
-
+    write_timestamp(1) # will be reported as failed due to the duplicate key, the other records are written
@@ -1,44 +1,257 @@
 # inspired by https://github.com/indently/five_decorators/blob/main/decorators/001_retry.py
 
+import asyncio
+import inspect
+import logging
+import random
+import threading
 import time
 from functools import wraps
-from typing import Callable, Any
-from time import sleep
+from typing import Callable, Any, Optional
 
-def retry(retries: int = 3, delay: float = 1) -> Callable:
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the function while its circuit breaker is open."""
+
+class RetryBudget:
+    """
+    A token bucket limiting the retries of all functions sharing it.
+
+    Each retry takes a token, tokens are refilled at a fixed rate up to the capacity.
+    When a dependency is down, the retries of all callers together are capped by the refill rate,
+    instead of multiplying the load on it by the number of retries.
+    """
+
+    def __init__(self, capacity: float = 10, refill_per_second: float = 1):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Takes a token for a retry, returns False if the budget is exhausted."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class CircuitBreaker:
+    """
+    Fails fast while a dependency is down.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail immediately
+    with CircuitOpenError. After reset_timeout seconds a single trial call is let through (half-open):
+    if it succeeds the circuit closes again, otherwise it stays open for another reset_timeout.
+    A trial call which ends without a verdict is released, and one which never reports back
+    is replaced by a new trial after reset_timeout.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raises CircuitOpenError if the call must not be made now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            # open long enough, or half-open with a trial call that never reported back
+            if now - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN  # this caller makes the trial call
+                self._opened_at = now
+                return
+            raise CircuitOpenError(f'circuit is {self.state}, failing fast')
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+
+    def release(self) -> None:
+        """Ends a trial call without a verdict, e.g. a non-retryable error or a cancellation, the next call may try."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+class RetryStats:
+    """Thread-safe counters of a decorated function, available as func.retry_stats."""
+
+    def __init__(self):
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.successes = 0
+        self.failures = 0
+        self.budget_exhausted = 0
+        self.circuit_open = 0
+        self._lock = threading.Lock()
+
+    def count(self, **increments: int) -> None:
+        with self._lock:
+            for name, increment in increments.items():
+                setattr(self, name, getattr(self, name) + increment)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {name: value for name, value in vars(self).items() if not name.startswith('_')}
+
+def retry(retries: int = 3, delay: float = 1, max_delay: float = 30,
+          retry_on: tuple[type[BaseException], ...] = (Exception,),
+          giveup: Optional[Callable[[BaseException], bool]] = None,
+          budget: Optional[RetryBudget] = None,
+          breaker: Optional[CircuitBreaker] = None) -> Callable:
     """
-    Calls the decorated function, retrying on failure with specified delay.
+    Calls the decorated function or coroutine function, retrying on failure
+    with exponential backoff and full jitter.
 
     Args:
         retries: Maximum number of retries (must be >= 1)
-        delay: Delay in seconds between retries (must be > 0)
+        delay: Base delay in seconds (must be > 0); before retry n a random delay
+            between 0 and min(max_delay, delay * 2**n) is waited, so callers failing
+            at the same time do not retry in lockstep
+        max_delay: Upper limit of the delay in seconds
+        retry_on: Only these exception types are retried, others are raised immediately
+        giveup: Optional predicate, an exception for which it returns True is not retried
+        budget: Optional RetryBudget shared by several functions, no retry without a token
+        breaker: Optional CircuitBreaker, calls fail fast with CircuitOpenError while it is open
     """
     if retries < 1 or delay <= 0:
         raise ValueError('retry must be >= 1, delay must be > 0')
 
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        def wrapper(*args, **kwargs) -> Any:
-            for attempt in range(retries + 1):
+        stats = RetryStats()
+
+        def before_attempt(attempt: int) -> None:
+            if breaker:
                 try:
-                    print(f'{attempt}. try calling {func.__name__}():')
-                    return func(*args, **kwargs)
-                except Exception as error:
-                    print(f'"{func.__name__}()" failed with {repr(error)} after {retries} retries.')
-                    if attempt == retries:
+                    breaker.before_call()
+                except CircuitOpenError:
+                    stats.count(circuit_open=1, failures=1)
+                    raise
+            stats.count(attempts=1)
+            logger.debug('%d. try calling %s()', attempt, func.__name__)
+
+        def on_success() -> None:
+            if breaker:
+                breaker.record_success()
+            stats.count(successes=1)
+
+        def on_abort() -> None:
+            if breaker:
+                breaker.release()
+
+        def backoff_after(attempt: int, error: Exception) -> float:
+            """Returns the delay before the next attempt, or re-raises error if there is none."""
+            retryable = isinstance(error, retry_on) and not (giveup and giveup(error))
+            if breaker:
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.release()  # a non-retryable error says nothing about the dependency
+            if not retryable or attempt == retries:
+                stats.count(failures=1)
+                logger.warning('%s() failed with %r after %d retries', func.__name__, error, attempt)
+                raise error
+            if budget and not budget.try_acquire():
+                stats.count(failures=1, budget_exhausted=1)
+                logger.warning('%s() failed with %r, retry budget exhausted', func.__name__, error)
+                raise error
+            stats.count(retries=1)
+            pause = random.uniform(0, min(max_delay, delay * 2 ** attempt))
+            logger.info('%s() failed with %r, retry %d of %d in %.2fs',
+                        func.__name__, error, attempt + 1, retries, pause)
+            return pause
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                stats.count(calls=1)
+                for attempt in range(retries + 1):
+                    before_attempt(attempt)
+                    try:
+                        result = await func(*args, **kwargs)
+                    except Exception as error:
+                        await asyncio.sleep(backoff_after(attempt, error))
+                    except BaseException:  # cancelled or interrupted
+                        on_abort()
                         raise
-                    sleep(delay)
-            return None  # never reached but avoids warning
+                    else:
+                        on_success()
+                        return result
+                return None  # never reached but avoids warning
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                stats.count(calls=1)
+                for attempt in range(retries + 1):
+                    before_attempt(attempt)
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as error:
+                        time.sleep(backoff_after(attempt, error))
+                    except BaseException:  # cancelled or interrupted
+                        on_abort()
+                        raise
+                    else:
+                        on_success()
+                        return result
+                return None  # never reached but avoids warning
+
+        wrapper.retry_stats = stats
         return wrapper
     return decorator
 
-@retry(retries=3, delay=1)
+# shared by all functions talking to the same (simulated) dependency
+connection_budget = RetryBudget(capacity=5, refill_per_second=0.5)
+connection_breaker = CircuitBreaker(failure_threshold=4, reset_timeout=2)
+
+@retry(retries=3, delay=0.1, retry_on=(ConnectionError,), budget=connection_budget, breaker=connection_breaker)
 def connect() -> None:
-    time.sleep(1)
-    raise Exception('Could not connect ...')
+    time.sleep(0.1)
+    raise ConnectionError('Could not connect ...')
+
+@retry(retries=5, delay=0.05, retry_on=(ConnectionError, TimeoutError))
+async def fetch(url: str) -> str:
+    await asyncio.sleep(0.05)
+    if random.random() < 0.5:
+        raise TimeoutError(f'{url} timed out')
+    return f'content of {url}'
 
 def main() -> None:
-    connect()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    # the first call opens the circuit after 4 failed attempts, the second one fails fast
+    for _ in range(2):
+        try:
+            connect()
+        except (ConnectionError, CircuitOpenError) as error:
+            print(f'connect() gave up: {error!r}')
+    print('connect() stats:', connect.retry_stats.as_dict())
+
+    async def fetch_all() -> list:
+        return await asyncio.gather(*(fetch(f'https://example.org/{n}') for n in range(5)), return_exceptions=True)
+    print(asyncio.run(fetch_all()))
+    print('fetch() stats:', fetch.retry_stats.as_dict())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,267 @@
+import asyncio
+import inspect
+import pickle
+import sqlite3
+import sys
+import threading
 import time
-from functools import cache
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, NamedTuple, Optional
 
-@cache
+class CacheInfo(NamedTuple):
+    """Like functools' CacheInfo, with the additional statistics of memoize."""
+    hits: int
+    misses: int
+    maxsize: Optional[int]
+    currsize: int
+    bytes: int
+    maxbytes: Optional[int]
+    evictions: int
+    expirations: int
+    disk_hits: int
+    coalesced: int
+    avg_hit_ms: float
+    avg_miss_ms: float
+
+class _KwargsMark:
+    """Separates positional from keyword arguments in cache keys, so f(1, b=2) and f(1, ('b', 2)) differ."""
+
+    def __repr__(self) -> str:
+        return '<kwargs>'  # stable across processes, as repr(key) is the key of the persistent tier
+
+_KWARGS_MARK = _KwargsMark()
+
+class _DiskTier:
+    """Persistent second cache tier in a SQLite file, surviving restarts of the program."""
+    PURGE_EVERY = 100  # puts between deletions of expired rows
+
+    def __init__(self, path: str, name: str):
+        self.name = name
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS cache '
+                        '(func TEXT, key TEXT, value BLOB, expires REAL, PRIMARY KEY (func, key))')
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.purge()
+
+    def get(self, key: str) -> tuple[bool, Any, Optional[float]]:
+        """Returns (found, value, expiry as time.time()) of a key."""
+        with self.lock:
+            row = self.db.execute('SELECT value, expires FROM cache WHERE func = ? AND key = ?',
+                                  (self.name, key)).fetchone()
+            if row is not None and row[1] is not None and row[1] <= time.time():
+                with self.db:
+                    self.db.execute('DELETE FROM cache WHERE func = ? AND key = ?', (self.name, key))
+                row = None
+        if row is None:
+            return False, None, None
+        return True, pickle.loads(row[0]), row[1]
+
+    def put(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        expires = time.time() + ttl if ttl is not None else None
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)',
+                            (self.name, key, pickle.dumps(value), expires))
+            self.puts += 1
+        if self.puts % self.PURGE_EVERY == 0:
+            self.purge()
+
+    def purge(self) -> None:
+        """Deletes the expired rows."""
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM cache WHERE func = ? AND expires <= ?', (self.name, time.time()))
+
+    def clear(self) -> None:
+        with self.lock, self.db:
+            self.db.execute('DELETE FROM cache WHERE func = ?', (self.name,))
+
+def memoize(maxsize: Optional[int] = 128, maxbytes: Optional[int] = None, ttl: Optional[float] = None,
+            persist: Optional[str] = None, sizeof: Callable[[Any], int] = sys.getsizeof) -> Callable:
+    """
+    Caches the results of the decorated function or coroutine function.
+
+    Concurrent calls with the same uncached arguments are computed only once (single flight):
+    the other threads or tasks wait for the first one and share its result.
+
+    :param maxsize: maximum number of cached results, the least recently used is evicted first (None: unbounded)
+    :param maxbytes: maximum total size of the cached results as measured by sizeof (None: unbounded)
+    :param ttl: seconds after which a cached result expires (None: never)
+    :param persist: path of a SQLite file used as a persistent second tier, created on the first miss,
+        values must be picklable
+    :param sizeof: function returning the size of a result in bytes
+    :return: the decorator; the decorated function has cache_info() and cache_clear() like functools.cache
+    """
+    def decorator(func: Callable) -> Callable:
+        entries: OrderedDict = OrderedDict()  # key -> (value, expires, size), least recently used first
+        lock = threading.RLock()  # guards entries, inflight and stats, never held during I/O
+        inflight: dict = {}  # key -> Future (threads) or asyncio.Task (coroutines) being loaded
+        disk: Optional[_DiskTier] = None  # opened on the first miss, importing the function creates no file
+        disk_lock = threading.Lock()
+        stats = dict(hits=0, misses=0, evictions=0, expirations=0, disk_hits=0, coalesced=0,
+                     bytes=0, hit_seconds=0.0, miss_seconds=0.0)
+
+        def make_key(args: tuple, kwargs: dict) -> tuple:
+            return args + (_KWARGS_MARK,) + tuple(sorted(kwargs.items())) if kwargs else args
+
+        def lookup(key: tuple) -> tuple[bool, Any]:
+            """Returns (found, value) from memory. Must be called with lock held."""
+            entry = entries.get(key)
+            if entry is not None:
+                value, expires, size = entry
+                if expires is None or expires > time.monotonic():
+                    entries.move_to_end(key)
+                    return True, value
+                del entries[key]
+                stats['bytes'] -= size
+                stats['expirations'] += 1
+            return False, None
+
+        def store(key: tuple, value: Any, expires: Optional[float]) -> None:
+            """Adds a result to memory and evicts least recently used ones over the limits."""
+            size = sizeof(value)
+            with lock:
+                if key in entries:
+                    stats['bytes'] -= entries.pop(key)[2]
+                entries[key] = (value, expires, size)
+                stats['bytes'] += size
+                while entries and ((maxsize is not None and len(entries) > maxsize)
+                                   or (maxbytes is not None and stats['bytes'] > maxbytes)):
+                    _, (_, _, evicted_size) = entries.popitem(last=False)
+                    stats['bytes'] -= evicted_size
+                    stats['evictions'] += 1
+
+        def load_from_disk(key: tuple) -> tuple[bool, Any]:
+            """Returns (found, value) from disk and keeps a found value in memory until its expiry on disk."""
+            found, value, expires = open_disk().get(repr(key))
+            if found:
+                with lock:
+                    stats['disk_hits'] += 1
+                store(key, value, None if expires is None else time.monotonic() + expires - time.time())
+            return found, value
+
+        def open_disk() -> _DiskTier:
+            nonlocal disk
+            with disk_lock:
+                if disk is None:
+                    disk = _DiskTier(persist, f'{func.__module__}.{func.__qualname__}')
+                return disk
+
+        def save_to_disk(key: tuple, value: Any) -> None:
+            open_disk().put(repr(key), value, ttl)
+
+        def remember(key: tuple, value: Any) -> None:
+            """Stores a computed result in memory, the caller writes it to disk outside the lock."""
+            store(key, value, time.monotonic() + ttl if ttl is not None else None)
+
+        def count(from_disk: bool, started: float) -> None:
+            """Counts the call of a leader, a result loaded from disk is a hit."""
+            name = 'hit' if from_disk else 'miss'
+            with lock:
+                stats['hits' if from_disk else 'misses'] += 1
+                stats[name + '_seconds'] += time.perf_counter() - started
+
+        if inspect.iscoroutinefunction(func):
+            async def load(key: tuple, args: tuple, kwargs: dict) -> tuple[bool, Any]:
+                """Returns (from_disk, value), the blocking disk I/O runs in a worker thread."""
+                if persist:
+                    found, value = await asyncio.to_thread(load_from_disk, key)
+                    if found:
+                        return True, value
+                value = await func(*args, **kwargs)
+                remember(key, value)
+                if persist:
+                    await asyncio.to_thread(save_to_disk, key, value)
+                return False, value
+
+            @wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                started = time.perf_counter()
+                key = make_key(args, kwargs)
+                with lock:
+                    found, value = lookup(key)
+                    if found:
+                        stats['hits'] += 1
+                        stats['hit_seconds'] += time.perf_counter() - started
+                        return value
+                    task = inflight.get(key)
+                    leader = task is None
+                    if leader:
+                        task = inflight[key] = asyncio.ensure_future(load(key, args, kwargs))
+                        task.add_done_callback(lambda _: inflight.pop(key, None))
+                    else:
+                        stats['coalesced'] += 1
+                # shield: a cancelled caller must not cancel the computation the others wait for
+                try:
+                    from_disk, value = await asyncio.shield(task)
+                except BaseException:
+                    if leader:
+                        count(False, started)
+                    raise
+                if leader:
+                    count(from_disk, started)
+                return value
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                started = time.perf_counter()
+                key = make_key(args, kwargs)
+                with lock:
+                    found, value = lookup(key)
+                    if found:
+                        stats['hits'] += 1
+                        stats['hit_seconds'] += time.perf_counter() - started
+                        return value
+                    future = inflight.get(key)
+                    leader = future is None
+                    if leader:
+                        future = inflight[key] = Future()
+                    else:
+                        stats['coalesced'] += 1
+                if not leader:
+                    return future.result()  # raises the exception of the leader, too
+                try:
+                    from_disk, value = load_from_disk(key) if persist else (False, None)
+                    if not from_disk:
+                        value = func(*args, **kwargs)
+                        remember(key, value)
+                        if persist:
+                            save_to_disk(key, value)
+                except BaseException as error:
+                    future.set_exception(error)
+                    count(False, started)
+                    raise
+                finally:
+                    with lock:
+                        del inflight[key]
+                future.set_result(value)
+                count(from_disk, started)
+                return value
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(
+                    stats['hits'], stats['misses'], maxsize, len(entries), stats['bytes'], maxbytes,
+                    stats['evictions'], stats['expirations'], stats['disk_hits'], stats['coalesced'],
+                    stats['hit_seconds'] * 1000 / stats['hits'] if stats['hits'] else 0.0,
+                    stats['miss_seconds'] * 1000 / stats['misses'] if stats['misses'] else 0.0)
+
+        def cache_clear(persistent: bool = True) -> None:
+            """Removes all cached results and resets the statistics, by default also from the persistent tier."""
+            with lock:
+                entries.clear()
+                for name in stats:
+                    stats[name] = 0
+            if persist and persistent:
+                open_disk().clear()
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+@memoize(maxsize=100, ttl=3600, persist='cache.sqlite3')
 def count_digits(text: str) -> int:
     """
     Counts all digits in the given text.
@@ -23,8 +283,14 @@ def main() -> None:
         elif text == '@reset':
             print('Cache reset.')
             count_digits.cache_clear()
+        elif text.startswith('@parallel '):
+            # five concurrent callers, only one of them counts
+            text = text.removeprefix('@parallel ')
+            with ThreadPoolExecutor(5) as executor:
+                results = list(executor.map(count_digits, [text] * 5))
+            print(f'"{text}" contains {results} digits.')
         else:
             print(f'"{text}" contains {count_digits(text)} digits.')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -1,37 +1,229 @@
+import asyncio
+import inspect
+import json
+import os
 import random
+import threading
+import timeit
+from contextvars import ContextVar
 from functools import wraps
-from time import perf_counter, sleep
-from typing import Callable, Any
+from time import perf_counter_ns, sleep
+from typing import Callable, Any, Optional
 
-def stopwatch(func: Callable) -> Callable:
-    @wraps(func)
-    def wrapper(*args, **kwargs) -> Any:
+class _Span:
+    """A running call: its call path and the time spent in its children so far."""
+    __slots__ = ('path', 'child_ns')
 
-        # Using the time of a single call can be misleading,
-        # also check for the timeit module.
-        started: float = perf_counter()
-        result: Any = func(*args, **kwargs)
-        end_time: float = perf_counter()
+    def __init__(self, path: tuple):
+        self.path = path
+        self.child_ns = 0
 
-        print(f'calling "{func.__name__}()" took {end_time - started:.3f} seconds')
-        return result
+class PathStats:
+    """Aggregated timings of one call path, with a histogram of power-of-two nanosecond buckets."""
+    __slots__ = ('calls', 'total_ns', 'self_ns', 'child_ns', 'min_ns', 'max_ns', 'buckets')
 
-    return wrapper
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.self_ns = 0
+        self.child_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+        self.buckets = {}  # bit length of the duration -> number of calls
+
+    def add(self, total_ns: int, child_ns: int) -> None:
+        self.calls += 1
+        self.total_ns += total_ns
+        self.self_ns += max(0, total_ns - child_ns)
+        self.child_ns += child_ns
+        self.min_ns = total_ns if self.min_ns is None else min(self.min_ns, total_ns)
+        self.max_ns = max(self.max_ns, total_ns)
+        bucket = total_ns.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, p: float) -> int:
+        """Upper bound of the histogram bucket containing the p-th percentile, in nanoseconds."""
+        rank = p / 100 * self.calls
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+class Profiler:
+    """
+    Collects the timings of functions decorated with stopwatch, aggregated per call path.
+
+    The current call path is kept in a context variable, so it follows asyncio tasks
+    and each thread has its own. Note that children running concurrently (e.g. with asyncio.gather)
+    can add up to more than their parent, their parent's self time is then reported as 0
+    while its children time is the real sum. In the Chrome trace, each asyncio task gets its own track.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace = False
+        self.max_events = 0
+        self.stats: dict[tuple, PathStats] = {}
+        self.events: list = []  # (name, start_ns, duration_ns, (thread id, task name)) for the Chrome trace
+        self._current: ContextVar[Optional[_Span]] = ContextVar('stopwatch_span', default=None)
+        self._lock = threading.Lock()
+        self._origin_ns = perf_counter_ns()
+
+    def enable(self, trace: bool = False, max_events: int = 100_000) -> None:
+        """
+        Starts collecting timings.
+
+        :param trace: also record every call (up to max_events) for write_chrome_trace
+        :param max_events: limits the memory used by the recorded calls
+        """
+        self.trace = trace
+        self.max_events = max_events
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stats.clear()
+            self.events.clear()
+
+    def _enter(self, name: str) -> tuple:
+        parent = self._current.get()
+        span = _Span(parent.path + (name,) if parent else (name,))
+        return parent, span, self._current.set(span)
+
+    def _exit(self, parent: Optional[_Span], span: _Span, token: Any, started: int) -> None:
+        duration = perf_counter_ns() - started
+        self._current.reset(token)
+        with self._lock:
+            if parent:
+                # under the lock: with asyncio.to_thread or copied contexts, children in other threads share the parent
+                parent.child_ns += duration
+            stats = self.stats.get(span.path)
+            if stats is None:
+                stats = self.stats[span.path] = PathStats()
+            stats.add(duration, span.child_ns)
+            if self.trace and len(self.events) < self.max_events:
+                self.events.append((span.path[-1], started, duration, self._track()))
+
+    @staticmethod
+    def _track() -> tuple:
+        """Thread and asyncio task of the caller, the calls on one track never overlap."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:  # no running event loop
+            task = None
+        return threading.get_ident(), task.get_name() if task else None
+
+    def stopwatch(self, func: Callable) -> Callable:
+        """Decorator timing the calls of a function or coroutine function, while the profiler is enabled."""
+        name = func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def wrapper(*args, **kwargs) -> Any:
+                if not self.enabled:
+                    return await func(*args, **kwargs)
+                parent, span, token = self._enter(name)
+                started = perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._exit(parent, span, token, started)
+        else:
+            @wraps(func)
+            def wrapper(*args, **kwargs) -> Any:
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                parent, span, token = self._enter(name)
+                started = perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._exit(parent, span, token, started)
+        return wrapper
+
+    def report(self) -> str:
+        """Returns a table of the call paths, nested by indentation, with times in milliseconds."""
+        lines = [f'{"call path":<40} {"calls":>7} {"total":>10} {"self":>10} {"children":>10} {"mean":>9} {"p50":>9} {"p99":>9}']
+        with self._lock:
+            for path in sorted(self.stats):
+                s = self.stats[path]
+                label = '  ' * (len(path) - 1) + path[-1]
+                lines.append(f'{label:<40} {s.calls:>7} {s.total_ns / 1e6:>10.3f} {s.self_ns / 1e6:>10.3f} '
+                             f'{s.child_ns / 1e6:>10.3f} {s.total_ns / s.calls / 1e6:>9.3f} '
+                             f'{s.percentile(50) / 1e6:>9.3f} {s.percentile(99) / 1e6:>9.3f}')
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Writes the recorded calls as trace events, to be opened in chrome://tracing or ui.perfetto.dev.
+
+        Complete events on one track must nest, so concurrent asyncio tasks get their own tracks, named after them.
+        """
+        pid = os.getpid()
+        tids: dict[tuple, int] = {}  # track -> tid, numbered in order of appearance
+        with self._lock:
+            events = [{'name': name, 'ph': 'X', 'pid': pid, 'tid': tids.setdefault(track, len(tids) + 1),
+                       'ts': (started - self._origin_ns) / 1000, 'dur': duration / 1000}
+                      for name, started, duration, track in self.events]
+        events += [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                    'args': {'name': f'thread {thread}' + (f' {task}' if task else '')}}
+                   for (thread, task), tid in tids.items()]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+    def write_collapsed(self, path: str) -> None:
+        """Writes the self times in microseconds as collapsed stacks, the input of flamegraph.pl or speedscope."""
+        with self._lock:
+            lines = [f'{";".join(p)} {s.self_ns // 1000}' for p, s in sorted(self.stats.items())]
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+profiler = Profiler()
+stopwatch = profiler.stopwatch
 
 
 @stopwatch
 def inner_function() -> None:
-    print('some inner time-consuming operation ...')
-    sleep(random.uniform(0.1, 0.5))
+    sleep(random.uniform(0.01, 0.05))
 
 @stopwatch
 def outer_function() -> None:
-    print('some outer time-consuming operation ...')
+    sleep(0.02)
     for i in range(0, 10):
         inner_function()
 
+@stopwatch
+async def fetch(n: int) -> None:
+    await asyncio.sleep(random.uniform(0.01, 0.05))
+
+@stopwatch
+async def fetch_all() -> None:
+    await asyncio.gather(*(fetch(n) for n in range(5)))
+
+@stopwatch
+def noop() -> None:
+    pass
+
 def main() -> None:
+    profiler.enable(trace=True)
+    outer_function()
     outer_function()
+    asyncio.run(fetch_all())
+    print(profiler.report())
+    profiler.write_chrome_trace('stopwatch.trace.json')
+    profiler.write_collapsed('stopwatch.collapsed')
+    print('written: stopwatch.trace.json, stopwatch.collapsed')
+
+    # Using the time of a single call can be misleading, timeit repeats it
+    profiler.disable()
+    number = 1_000_000
+    overhead = (timeit.timeit(noop, number=number) - timeit.timeit(noop.__wrapped__, number=number)) / number
+    print(f'overhead of a disabled stopwatch: {overhead * 1e9:.0f} ns per call')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()